@@ -425,13 +425,28 @@ func unmarshalPossiblyNoisyJSON(output []byte, v any) error {
 		if err := json.Unmarshal([]byte(cleaned), v); err == nil {
 			return nil
 		}
-		// 3) try last JSON object (in case logs precede it)
-		if i := strings.LastIndex(cleaned, "{"); i >= 0 {
-			tail := strings.TrimSpace(cleaned[i:])
-			if tail != "" {
-				if err := json.Unmarshal([]byte(tail), v); err == nil {
-					return nil
-				}
+		// 3) logs may surround the payload: take the last complete top-level object.
+		// Scanning forward and skipping past each decoded object keeps nested
+		// objects from being mistaken for the payload.
+		var last json.RawMessage
+		for i := 0; i < len(cleaned); {
+			j := strings.IndexByte(cleaned[i:], '{')
+			if j < 0 {
+				break
+			}
+			start := i + j
+			dec := json.NewDecoder(strings.NewReader(cleaned[start:]))
+			var raw json.RawMessage
+			if err := dec.Decode(&raw); err == nil {
+				last = raw
+				i = start + int(dec.InputOffset())
+				continue
+			}
+			i = start + 1
+		}
+		if last != nil {
+			if err := json.Unmarshal(last, v); err == nil {
+				return nil
 			}
 		}
 	}
@@ -604,8 +619,12 @@ type PDFTextCLIResponse struct {
 	Layout    string             `json:"layout,omitempty"` // zones|ordered|raw
 	Ordered   bool               `json:"ordered,omitempty"`
 	PageCount int                `json:"page_count,omitempty"`
-	Extractor string             `json:"extractor,omitempty"`
-	Error     string             `json:"error,omitempty"`
+
+	// Embedded text per page and whether it looks like a real (Chinese) text layer.
+	HasTextLayer bool    `json:"has_text_layer,omitempty"`
+	TextDensity  float64 `json:"text_density,omitempty"`
+	Extractor    string  `json:"extractor,omitempty"`
+	Error        string  `json:"error,omitempty"`
 }
 
 type PDFTextZonesSpan struct {
@@ -644,34 +663,44 @@ func (s *OCRService) extractTextWithPyMuPDFMeta(pdfPath string) (string, string,
 		return "", "", nil, fmt.Errorf("pdf_text_cli.py script not found")
 	}
 
-	ctx, cancel := context.WithTimeout(context.Background(), 20*time.Second)
-	defer cancel()
+	layout := strings.ToLower(strings.TrimSpace(os.Getenv("SBM_PDF_TEXT_LAYOUT")))
+	if layout == "" {
+		layout = "zones"
+	}
+	if layout != "zones" && layout != "ordered" && layout != "raw" {
+		layout = "zones"
+	}
+	includeZones := strings.ToLower(strings.TrimSpace(os.Getenv("SBM_PDF_TEXT_INCLUDE_ZONES")))
+	if includeZones == "" {
+		includeZones = "true"
+	}
+	zonesPages := strings.TrimSpace(os.Getenv("SBM_PDF_TEXT_ZONES_PAGES"))
+	if zonesPages == "" {
+		zonesPages = "1"
+	}
 
-	run := func(python string) ([]byte, error) {
-		layout := strings.ToLower(strings.TrimSpace(os.Getenv("SBM_PDF_TEXT_LAYOUT")))
-		if layout == "" {
-			layout = "zones"
-		}
-		if layout != "zones" && layout != "ordered" && layout != "raw" {
-			layout = "zones"
-		}
-		includeZones := strings.ToLower(strings.TrimSpace(os.Getenv("SBM_PDF_TEXT_INCLUDE_ZONES")))
-		if includeZones == "" {
-			includeZones = "true"
-		}
-		zonesPages := strings.TrimSpace(os.Getenv("SBM_PDF_TEXT_ZONES_PAGES"))
-		if zonesPages == "" {
-			zonesPages = "1"
-		}
+	run := func(ctx context.Context, python string) ([]byte, error) {
 		cmd := exec.CommandContext(ctx, python, scriptPath, pdfPath, "--layout", layout, "--include-zones", includeZones, "--zones-pages", zonesPages)
 		return cmd.CombinedOutput()
 	}
 
-	output, execErr := run("python3")
-	if execErr != nil {
-		if altOut, altErr := run("python"); altErr == nil || len(altOut) > 0 {
-			output = altOut
-			execErr = altErr
+	var output []byte
+	var execErr error
+	if ocrWorkerEnabled() {
+		output, execErr = extractPDFTextWithWorker(scriptPath, pdfPath, layout, includeZones, zonesPages)
+		if execErr != nil {
+			fmt.Printf("[OCR] PDF text worker failed, falling back to CLI: %v\n", execErr)
+		}
+	}
+	if output == nil || execErr != nil {
+		ctx, cancel := context.WithTimeout(context.Background(), 20*time.Second)
+		defer cancel()
+		output, execErr = run(ctx, "python3")
+		if execErr != nil {
+			if altOut, altErr := run(ctx, "python"); altErr == nil || len(altOut) > 0 {
+				output = altOut
+				execErr = altErr
+			}
 		}
 	}
 
@@ -692,7 +721,7 @@ func (s *OCRService) extractTextWithPyMuPDFMeta(pdfPath string) (string, string,
 		text = result.RawText
 	}
 
-	layout := strings.ToLower(strings.TrimSpace(result.Layout))
+	layout = strings.ToLower(strings.TrimSpace(result.Layout))
 	if layout == "" {
 		layout = "raw"
 	}
@@ -701,7 +730,7 @@ func (s *OCRService) extractTextWithPyMuPDFMeta(pdfPath string) (string, string,
 		source = "pymupdf_zones"
 	}
 
-	fmt.Printf("[OCR] PyMuPDF extracted %d characters from %d pages (%s, layout=%s, ordered=%v)\n", len(text), result.PageCount, result.Extractor, layout, result.Ordered)
+	fmt.Printf("[OCR] PyMuPDF extracted %d characters from %d pages (%s, layout=%s, ordered=%v, text_layer=%v, density=%.1f)\n", len(text), result.PageCount, result.Extractor, layout, result.Ordered, result.HasTextLayer, result.TextDensity)
 	return text, source, &result, nil
 }
 
@@ -0,0 +1,58 @@
+package services
+
+import (
+	"testing"
+)
+
+// TestUnmarshalPossiblyNoisyJSON checks that payloads with nested objects survive
+// log lines printed before and after them (e.g. SBM_OCR_DEBUG=true).
+func TestUnmarshalPossiblyNoisyJSON(t *testing.T) {
+	type payload struct {
+		Success bool `json:"success"`
+		Lines   []struct {
+			Text string `json:"text"`
+		} `json:"lines"`
+		Params map[string]any `json:"params"`
+	}
+
+	tests := []struct {
+		name  string
+		input string
+		lines int
+	}{
+		{
+			name:  "clean output",
+			input: `{"success":true,"lines":[{"text":"a"}],"params":{"profile":"pdf"}}`,
+			lines: 1,
+		},
+		{
+			name:  "log line before nested payload",
+			input: "\x1b[32m[RapidOCR] INFO: {model loaded}\x1b[0m\n" + `{"success":true,"lines":[{"text":"a"},{"text":"b"}],"params":{"profile":"pdf"}}`,
+			lines: 2,
+		},
+		{
+			name:  "debug json before and warning after payload",
+			input: `{"pass":"original","score":0.9}` + "\n" + `{"success":true,"lines":[{"text":"a"}],"params":{"profile":"pdf"}}` + "\nwarning: done\n",
+			lines: 1,
+		},
+	}
+
+	for _, tt := range tests {
+		t.Run(tt.name, func(t *testing.T) {
+			var got payload
+			if err := unmarshalPossiblyNoisyJSON([]byte(tt.input), &got); err != nil {
+				t.Fatalf("unmarshalPossiblyNoisyJSON() error = %v", err)
+			}
+			if !got.Success || len(got.Lines) != tt.lines || got.Params["profile"] != "pdf" {
+				t.Errorf("unexpected payload: %+v", got)
+			}
+		})
+	}
+
+	t.Run("no JSON object", func(t *testing.T) {
+		var got payload
+		if err := unmarshalPossiblyNoisyJSON([]byte("Traceback: boom"), &got); err == nil {
+			t.Error("expected error for output without JSON")
+		}
+	})
+}
@@ -25,10 +25,57 @@ type rapidOCRWorkerProcess struct {
 	stdout *bufio.Reader
 	waitCh chan error
 
+	// args are appended after the script path (e.g. "--serve" for pdf_text_cli.py).
+	args []string
+	// name prefixes error messages; defaults to "ocr worker".
+	name string
+
 	reqCount int64
 }
 
-var globalRapidOCRWorker rapidOCRWorkerProcess
+// rapidOCRWorkerPool keeps up to N persistent python workers so concurrent OCR jobs
+// (bounded by SBM_LIMIT_OCR) don't queue behind a single process.
+type rapidOCRWorkerPool struct {
+	once    sync.Once
+	workers []*rapidOCRWorkerProcess
+	idle    chan *rapidOCRWorkerProcess
+}
+
+var globalRapidOCRWorkers rapidOCRWorkerPool
+
+func ocrWorkerPoolSize() int {
+	// Each worker keeps its own copy of the models resident, so default to a single process.
+	// More workers than the OCR concurrency limit would never be used.
+	n := int(getEnvInt64("SBM_OCR_WORKERS", 1))
+	if n < 1 {
+		n = 1
+	}
+	if c := cap(limitOCR.ch); c > 0 && n > c {
+		n = c
+	}
+	return n
+}
+
+func (p *rapidOCRWorkerPool) init() {
+	p.once.Do(func() {
+		n := ocrWorkerPoolSize()
+		p.idle = make(chan *rapidOCRWorkerProcess, n)
+		for i := 0; i < n; i++ {
+			w := &rapidOCRWorkerProcess{}
+			p.workers = append(p.workers, w)
+			p.idle <- w
+		}
+	})
+}
+
+func (p *rapidOCRWorkerPool) acquire() *rapidOCRWorkerProcess {
+	p.init()
+	return <-p.idle
+}
+
+func (p *rapidOCRWorkerPool) release(w *rapidOCRWorkerProcess) {
+	p.idle <- w
+}
 
 func ocrWorkerEnabled() bool {
 	v := strings.ToLower(strings.TrimSpace(os.Getenv("SBM_OCR_WORKER")))
@@ -119,10 +166,14 @@ func StartOCRWorkerIfEnabled() (bool, error) {
 	if strings.TrimSpace(scriptPath) == "" {
 		return false, fmt.Errorf("ocr worker enabled but scripts/ocr_worker.py not found")
 	}
-	globalRapidOCRWorker.mu.Lock()
-	defer globalRapidOCRWorker.mu.Unlock()
-	if err := globalRapidOCRWorker.ensureStartedLocked(scriptPath); err != nil {
-		return false, err
+	globalRapidOCRWorkers.init()
+	for _, w := range globalRapidOCRWorkers.workers {
+		w.mu.Lock()
+		err := w.ensureStartedLocked(scriptPath)
+		w.mu.Unlock()
+		if err != nil {
+			return false, err
+		}
 	}
 	return true, nil
 }
@@ -194,7 +245,7 @@ func (w *rapidOCRWorkerProcess) stopLocked() {
 }
 
 func (w *rapidOCRWorkerProcess) startLocked(python string, scriptPath string) error {
-	cmd := exec.Command(python, scriptPath)
+	cmd := exec.Command(python, append([]string{scriptPath}, w.args...)...)
 	cmd.Env = append(os.Environ(), "PYTHONUNBUFFERED=1")
 
 	stdoutPipe, err := cmd.StdoutPipe()
@@ -263,25 +314,29 @@ type ocrWorkerBaseResponse struct {
 	Error   string `json:"error,omitempty"`
 }
 
-func (w *rapidOCRWorkerProcess) recognizeLocked(scriptPath string, imagePath string, profile string) ([]byte, error) {
+func (w *rapidOCRWorkerProcess) label() string {
+	if w.name != "" {
+		return w.name
+	}
+	return "ocr worker"
+}
+
+// roundTripLocked sends one JSON-line request and waits for the matching response line.
+func (w *rapidOCRWorkerProcess) roundTripLocked(scriptPath string, req map[string]any, timeout time.Duration) ([]byte, error) {
 	if err := w.ensureStartedLocked(scriptPath); err != nil {
 		return nil, err
 	}
 	w.reqCount += 1
 
 	reqID := randHex(12)
-	req := map[string]any{
-		"id":         reqID,
-		"type":       "ocr",
-		"image_path": imagePath,
-		"profile":    profile,
-	}
+	req["id"] = reqID
 	b, _ := json.Marshal(req)
 	b = append(b, '\n')
 
+	name := w.label()
 	if _, err := w.stdin.Write(b); err != nil {
 		w.stopLocked()
-		return nil, fmt.Errorf("ocr worker write failed: %w", err)
+		return nil, fmt.Errorf("%s write failed: %w", name, err)
 	}
 
 	type readRes struct {
@@ -298,36 +353,47 @@ func (w *rapidOCRWorkerProcess) recognizeLocked(scriptPath string, imagePath str
 	case r := <-ch:
 		if r.err != nil {
 			w.stopLocked()
-			return nil, fmt.Errorf("ocr worker read failed: %w", r.err)
+			return nil, fmt.Errorf("%s read failed: %w", name, r.err)
 		}
 		line := bytes.TrimSpace(r.line)
 		if len(line) == 0 {
-			return nil, fmt.Errorf("ocr worker returned empty response")
+			return nil, fmt.Errorf("%s returned empty response", name)
 		}
 
 		var base ocrWorkerBaseResponse
 		if err := unmarshalPossiblyNoisyJSON(line, &base); err != nil {
-			return nil, fmt.Errorf("ocr worker returned invalid json: %w", err)
+			return nil, fmt.Errorf("%s returned invalid json: %w", name, err)
 		}
 		if strings.TrimSpace(base.ID) != reqID {
-			return nil, fmt.Errorf("ocr worker response id mismatch")
+			return nil, fmt.Errorf("%s response id mismatch", name)
 		}
 		if !base.Success {
 			if strings.TrimSpace(base.Error) == "" {
-				return nil, fmt.Errorf("ocr worker failed")
+				return nil, fmt.Errorf("%s failed", name)
 			}
-			return nil, fmt.Errorf("ocr worker failed: %s", strings.TrimSpace(base.Error))
+			return nil, fmt.Errorf("%s failed: %s", name, strings.TrimSpace(base.Error))
 		}
 
 		return line, nil
-	case <-time.After(rapidOCRTimeout + 10*time.Second):
+	case <-time.After(timeout):
 		w.stopLocked()
-		return nil, fmt.Errorf("ocr worker timeout")
+		return nil, fmt.Errorf("%s timeout", name)
+	}
+}
+
+func (w *rapidOCRWorkerProcess) recognizeLocked(scriptPath string, imagePath string, profile string) ([]byte, error) {
+	req := map[string]any{
+		"type":       "ocr",
+		"image_path": imagePath,
+		"profile":    profile,
 	}
+	return w.roundTripLocked(scriptPath, req, rapidOCRTimeout+10*time.Second)
 }
 
 func recognizeWithRapidOCRWorker(scriptPath string, imagePath string, profile string) ([]byte, error) {
-	globalRapidOCRWorker.mu.Lock()
-	defer globalRapidOCRWorker.mu.Unlock()
-	return globalRapidOCRWorker.recognizeLocked(scriptPath, imagePath, profile)
+	w := globalRapidOCRWorkers.acquire()
+	defer globalRapidOCRWorkers.release(w)
+	w.mu.Lock()
+	defer w.mu.Unlock()
+	return w.recognizeLocked(scriptPath, imagePath, profile)
 }
@@ -0,0 +1,20 @@
+package services
+
+import "time"
+
+// pdfTextWorker keeps one `pdf_text_cli.py --serve` process alive so each PDF doesn't pay
+// for interpreter startup and the PyMuPDF import. It follows SBM_OCR_WORKER like the OCR pool.
+var pdfTextWorker = &rapidOCRWorkerProcess{args: []string{"--serve"}, name: "pdf text worker"}
+
+func extractPDFTextWithWorker(scriptPath string, pdfPath string, layout string, includeZones string, zonesPages string) ([]byte, error) {
+	pdfTextWorker.mu.Lock()
+	defer pdfTextWorker.mu.Unlock()
+	req := map[string]any{
+		"type":          "pdf_text",
+		"pdf_path":      pdfPath,
+		"layout":        layout,
+		"include_zones": includeZones,
+		"zones_pages":   zonesPages,
+	}
+	return pdfTextWorker.roundTripLocked(scriptPath, req, 20*time.Second)
+}
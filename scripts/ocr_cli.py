@@ -8,20 +8,41 @@ Notes:
 - This CLI must print strict JSON only (the Go backend parses process output).
 - For invoice PDF pages (profile=pdf), an optional multi-pass preprocessing is used
   to improve recall of small fields (buyer/seller, invoice code/number/date).
+- `--rec-only` treats the input as one already-cropped text region and runs only
+  the recognition model (no detection/classification, no multi-pass).
 """
 
 from __future__ import annotations
 
 import argparse
+import bisect
 import contextlib
 import json
+import logging
 import traceback
 import os
 import sys
-import tempfile
+import threading
+import time
 from importlib import metadata
 from pathlib import Path
 
+from ocr_common import (
+    box_reading_order,
+    build_variants,
+    load_pil_image,
+    openvino_engine_params,
+    ort_engine_params,
+    prefetch_model_files,
+    rec_batch_params,
+    resolve_model_paths,
+    run_passes_concurrently,
+    safe_float,
+    safe_int,
+    skip_remaining_variants,
+    truthy,
+)
+
 
 @contextlib.contextmanager
 def suppress_child_output():
@@ -29,8 +50,24 @@ def suppress_child_output():
     Suppress any third-party stdout/stderr noise (e.g. RapidOCR logs) so this CLI
     prints strict JSON only. This is required because the Go backend parses the
     entire process output as JSON.
+
+    Python log records are dropped up-front (logging.disable) so they are never formatted;
+    the fd-level redirect additionally catches native onnxruntime/OpenCV output and can be
+    turned off with SBM_OCR_HARDSILENCE=0. With SBM_OCR_DEBUG enabled nothing is suppressed.
     """
 
+    if truthy(os.getenv("SBM_OCR_DEBUG")):
+        yield
+        return
+
+    logging.disable(logging.WARNING)
+    if os.getenv("SBM_OCR_HARDSILENCE") is not None and not truthy(os.getenv("SBM_OCR_HARDSILENCE")):
+        try:
+            yield
+        finally:
+            logging.disable(logging.NOTSET)
+        return
+
     devnull = open(os.devnull, "w")
     old_stdout_fd = os.dup(1)
     old_stderr_fd = os.dup(2)
@@ -46,19 +83,20 @@ def suppress_child_output():
             os.close(old_stdout_fd)
             os.close(old_stderr_fd)
             devnull.close()
+            logging.disable(logging.NOTSET)
 
 
-def truthy(v: str | None) -> bool:
-    if v is None:
-        return False
-    return str(v).strip().lower() in ("1", "true", "yes", "y", "on")
-
-
-def safe_int(v: str | None, default: int) -> int:
+def dumps_json(obj) -> str:
+    """
+    Serialize the result payload. Uses orjson when it is installed (much faster on pages with
+    hundreds of lines/boxes) and falls back to the stdlib; both emit UTF-8 text, not \\u escapes.
+    """
     try:
-        return int(str(v).strip())
+        import orjson
+
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
     except Exception:
-        return default
+        return json.dumps(obj, ensure_ascii=False)
 
 
 def score_lines(lines: list[dict]) -> float:
@@ -69,119 +107,47 @@ def score_lines(lines: list[dict]) -> float:
     if not lines:
         return 0.0
 
+    import numpy as np
+
     total_conf = 0.0
-    total_len = 0
-    cjk = 0
-    digits = 0
     for l in lines:
-        t = l.get("text") or ""
-        total_len += len(t)
         total_conf += float(l.get("confidence") or 0.0)
-        for ch in t:
-            o = ord(ch)
-            if 0x4E00 <= o <= 0x9FFF:
-                cjk += 1
-            elif "0" <= ch <= "9":
-                digits += 1
+
+    # Count characters on a single uint32 codepoint array instead of looping per character.
+    joined = "".join(str(l.get("text") or "") for l in lines)
+    cps = np.frombuffer(joined.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    total_len = int(cps.size)
+    cjk = int(np.count_nonzero((cps >= 0x4E00) & (cps <= 0x9FFF)))
+    digits = int(np.count_nonzero((cps >= 0x30) & (cps <= 0x39)))
 
     avg_conf = total_conf / max(len(lines), 1)
     content = (cjk * 2.0) + (digits * 1.2) + (max(total_len - cjk - digits, 0) * 0.25)
     return (content + (len(lines) * 10.0)) * (0.25 + avg_conf)
 
 
-def load_pil_image(path: str):
-    try:
-        from PIL import Image
-
-        im = Image.open(path)
-        im.load()
-        return im
-    except Exception:
-        return None
-
-
-def reorder_lines_by_box(lines: list[dict]) -> list[dict]:
+def shrink_pil_image(im, max_side: int):
     """
-    Reorder OCR lines based on bounding boxes:
-    - Cluster by Y (row) with a tolerance based on median height
-    - Sort rows by top, and items within a row by left
-    If boxes are missing, original order is kept.
+    Box-reduce `im` by the largest factor of 2, 4 or 8 that keeps its long side >= `max_side`
+    (the same scales libjpeg's DCT scaling offers), or return it unchanged.
     """
-    if not lines:
-        return lines
-
-    processed = []
-    for line in lines:
-        box = line.get("box") or []
-        if not box:
-            continue
-        try:
-            xs = [p[0] for p in box if isinstance(p, (list, tuple)) and len(p) >= 2]
-            ys = [p[1] for p in box if isinstance(p, (list, tuple)) and len(p) >= 2]
-            if not xs or not ys:
-                continue
-            minx, maxx = min(xs), max(xs)
-            miny, maxy = min(ys), max(ys)
-            processed.append(
-                {
-                    "line": line,
-                    "minx": minx,
-                    "maxx": maxx,
-                    "miny": miny,
-                    "maxy": maxy,
-                    "height": max(1.0, maxy - miny),
-                }
-            )
-        except Exception:
-            continue
-
-    if not processed:
-        return lines
-
-    heights = sorted(p["height"] for p in processed)
-    mid = len(heights) // 2
-    median_h = heights[mid] if len(heights) % 2 else (heights[mid - 1] + heights[mid]) / 2
-    row_tol = max(5.0, median_h * 0.6)
-
-    processed.sort(key=lambda p: (p["miny"], p["minx"]))
-
-    rows: list[list[dict]] = []
-    current_row: list[dict] = []
-    current_maxy = None
-    for p in processed:
-        if current_row and current_maxy is not None and p["miny"] > current_maxy + row_tol:
-            rows.append(current_row)
-            current_row = [p]
-            current_maxy = p["maxy"]
-        else:
-            current_row.append(p)
-            current_maxy = p["maxy"] if current_maxy is None else max(current_maxy, p["maxy"])
-    if current_row:
-        rows.append(current_row)
-
-    ordered = []
-    for row in rows:
-        row.sort(key=lambda p: p["minx"])
-        ordered.extend(row)
-
-    return [p["line"] for p in ordered]
-
-
-def apply_label_value_layout(lines: list[dict], profile: str) -> list[dict]:
-    """
-    Layout-aware postprocess for "bill detail" screenshots where OCR may output a label column
-    and a value column separately. We pair labels with their nearest value using box geometry,
-    then rewrite the label line into "标签：值" and remove the paired value line.
+    if im is None or max_side <= 0:
+        return im
+    factor = 1
+    while factor < 8 and max(im.size) // (factor * 2) >= max_side:
+        factor *= 2
+    if factor == 1:
+        return im
+    try:
+        return im.reduce(factor)
+    except Exception:
+        return im
 
-    This makes downstream field parsing much more stable for OCR outputs that separate labels and values.
-    """
-    if profile != "default" or not lines:
-        return lines
 
-    # Shared bill-detail labels across WeChat / Alipay / bank transfer screenshots.
-    # The goal is NOT to "understand" semantics here, only to stabilize the text stream
-    # into a more parseable "标签：值" form when OCR outputs a separate label/value column.
-    label_set = {
+# Shared bill-detail labels across WeChat / Alipay / bank transfer screenshots.
+# The goal is NOT to "understand" semantics here, only to stabilize the text stream
+# into a more parseable "标签：值" form when OCR outputs a separate label/value column.
+_BILL_DETAIL_LABELS = frozenset(
+    {
         # Common identifiers
         "交易单号",
         "交易号",
@@ -212,44 +178,57 @@ def apply_label_value_layout(lines: list[dict], profile: str) -> list[dict]:
         "商品",
         "商品说明",
     }
+)
 
-    def norm(t: str) -> str:
-        return str(t or "").strip()
 
-    def is_label(t: str) -> bool:
-        return norm(t) in label_set
+def _norm_text(t: str) -> str:
+    return str(t or "").strip()
 
-    def box_of(line: dict):
-        box = line.get("box") or []
-        if not isinstance(box, (list, tuple)) or not box:
-            return None
-        try:
-            xs = [p[0] for p in box if isinstance(p, (list, tuple)) and len(p) >= 2]
-            ys = [p[1] for p in box if isinstance(p, (list, tuple)) and len(p) >= 2]
-            if not xs or not ys:
-                return None
-            left = float(min(xs))
-            right = float(max(xs))
-            top = float(min(ys))
-            bottom = float(max(ys))
-            return {
-                "left": left,
-                "right": right,
-                "top": top,
-                "bottom": bottom,
-                "cx": (left + right) / 2.0,
-                "cy": (top + bottom) / 2.0,
-                "h": max(bottom - top, 1.0),
-                "w": max(right - left, 1.0),
-            }
-        except Exception:
+
+def _label_box(line: dict):
+    box = line.get("box") or []
+    if not isinstance(box, (list, tuple)) or not box:
+        return None
+    try:
+        xs = [p[0] for p in box if isinstance(p, (list, tuple)) and len(p) >= 2]
+        ys = [p[1] for p in box if isinstance(p, (list, tuple)) and len(p) >= 2]
+        if not xs or not ys:
             return None
+        left = float(min(xs))
+        right = float(max(xs))
+        top = float(min(ys))
+        bottom = float(max(ys))
+        return {
+            "left": left,
+            "right": right,
+            "top": top,
+            "bottom": bottom,
+            "cx": (left + right) / 2.0,
+            "cy": (top + bottom) / 2.0,
+            "h": max(bottom - top, 1.0),
+            "w": max(right - left, 1.0),
+        }
+    except Exception:
+        return None
+
+
+def apply_label_value_layout(lines: list[dict], profile: str) -> list[dict]:
+    """
+    Layout-aware postprocess for "bill detail" screenshots where OCR may output a label column
+    and a value column separately. We pair labels with their nearest value using box geometry,
+    then rewrite the label line into "标签：值" and remove the paired value line.
 
-    label_idxs = [i for i, ln in enumerate(lines) if is_label(ln.get("text", ""))]
+    This makes downstream field parsing much more stable for OCR outputs that separate labels and values.
+    """
+    if profile != "default" or not lines:
+        return lines
+
+    texts = [_norm_text(ln.get("text", "")) for ln in lines]
+    label_idxs = [i for i, t in enumerate(texts) if t in _BILL_DETAIL_LABELS]
     if len(label_idxs) < 4:
         return lines
 
-    boxes = [box_of(ln) for ln in lines]
+    boxes = [_label_box(ln) for ln in lines]
     heights = sorted([b["h"] for b in boxes if b])
     if not heights:
         return lines
@@ -257,6 +236,15 @@ def apply_label_value_layout(lines: list[dict], profile: str) -> list[dict]:
     y_tol = max(8.0, median_h * 0.75)
     x_tol = max(24.0, median_h * 2.5)
 
+    # Non-label lines with a box are the value candidates, indexed by vertical center (same-row
+    # search) and by top (below-the-label search) so each label only scans a narrow band.
+    label_flags = set(label_idxs)
+    candidates = [vi for vi, vb in enumerate(boxes) if vb and vi not in label_flags]
+    by_cy = sorted(candidates, key=lambda vi: boxes[vi]["cy"])
+    cys = [boxes[vi]["cy"] for vi in by_cy]
+    by_top = sorted(candidates, key=lambda vi: boxes[vi]["top"])
+    tops = [boxes[vi]["top"] for vi in by_top]
+
     used_values: set[int] = set()
     label_to_value: dict[int, int] = {}
 
@@ -267,37 +255,38 @@ def apply_label_value_layout(lines: list[dict], profile: str) -> list[dict]:
 
         best = None
         best_dx = None
-        for vi, vb in enumerate(boxes):
-            if vi == li or vi in used_values:
-                continue
-            if is_label(lines[vi].get("text", "")):
-                continue
-            if not vb:
+        lo = bisect.bisect_left(cys, lb["cy"] - y_tol - 1e-6)
+        hi = bisect.bisect_right(cys, lb["cy"] + y_tol + 1e-6)
+        for vi in by_cy[lo:hi]:
+            if vi in used_values:
                 continue
+            vb = boxes[vi]
             if abs(vb["cy"] - lb["cy"]) > y_tol:
                 continue
             dx = vb["left"] - lb["right"]
             if dx < -5.0:
                 continue
-            if best_dx is None or dx < best_dx:
+            # Ties go to the earliest line, as in a scan in line order.
+            if best_dx is None or dx < best_dx or (dx == best_dx and vi < best):
                 best_dx = dx
                 best = vi
 
         if best is None:
             best_dy = None
-            for vi, vb in enumerate(boxes):
-                if vi == li or vi in used_values:
-                    continue
-                if is_label(lines[vi].get("text", "")):
-                    continue
-                if not vb:
-                    continue
+            # Candidates come in increasing top order, so the distance below the label only grows.
+            for pos in range(bisect.bisect_left(tops, lb["bottom"] - 2.0 - 1e-6), len(by_top)):
+                vi = by_top[pos]
+                vb = boxes[vi]
                 if vb["top"] < lb["bottom"] - 2.0:
                     continue
+                dy = vb["top"] - lb["bottom"]
+                if best_dy is not None and dy > best_dy:
+                    break
+                if vi in used_values:
+                    continue
                 if abs(vb["left"] - lb["left"]) > x_tol:
                     continue
-                dy = vb["top"] - lb["bottom"]
-                if best_dy is None or dy < best_dy:
+                if best_dy is None or dy < best_dy or (dy == best_dy and vi < best):
                     best_dy = dy
                     best = vi
 
@@ -312,10 +301,10 @@ def apply_label_value_layout(lines: list[dict], profile: str) -> list[dict]:
     for i, ln in enumerate(lines):
         if i in used_values:
             continue
-        t = norm(ln.get("text", ""))
+        t = texts[i]
         if i in label_to_value:
             v_idx = label_to_value[i]
-            v_text = norm(lines[v_idx].get("text", ""))
+            v_text = texts[v_idx]
             if v_text:
                 merged = dict(ln)
                 merged["text"] = f"{t}：{v_text}"
@@ -334,43 +323,129 @@ def apply_label_value_layout(lines: list[dict], profile: str) -> list[dict]:
     return out
 
 
-def build_variants(pil_img, profile: str, multipass: int, rotate180: bool):
-    if pil_img is None or multipass <= 0:
-        return []
+def ocr_cache_path(args, image_path: str) -> Path | None:
+    """
+    Content-addressed location for this request's result, or None when the cache is disabled.
 
+    The key covers the image bytes, the CLI arguments, every SBM_* setting, the RapidOCR version,
+    the model files on disk and this script itself, so any change that could alter the output
+    (including a model re-download or INT8 rebuild) misses the cache.
+    The cache lives in <SBM_OCR_DATA_DIR>/ocr-cache; SBM_OCR_CACHE_MB=0 disables it.
+    Image bytes are hashed with xxh3 when the `xxhash` package is installed, blake2b otherwise.
+    """
+    data_dir = (os.getenv("SBM_OCR_DATA_DIR") or os.getenv("SBM_DATA_DIR") or "").strip()
+    if not data_dir or safe_int(os.getenv("SBM_OCR_CACHE_MB"), 64) <= 0:
+        return None
     try:
-        from PIL import ImageEnhance, ImageOps
+        import hashlib
+
+        try:
+            # Optional: xxh3 hashes large scans several times faster than blake2b.
+            import xxhash
+
+            new_hash = xxhash.xxh3_128
+        except ImportError:
+            from functools import partial
+
+            new_hash = partial(hashlib.blake2b, digest_size=20)
+
+        with open(image_path, "rb") as f:
+            if hasattr(hashlib, "file_digest"):
+                # Python 3.11+: hashes straight from the fd with a reused buffer, no per-chunk bytes objects.
+                h = hashlib.file_digest(f, new_hash)
+            else:
+                h = new_hash()
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+
+        try:
+            rapidocr_version = metadata.version("rapidocr")
+        except metadata.PackageNotFoundError:
+            rapidocr_version = "unknown"
+        script = Path(__file__).stat()
+        key = {
+            "args": {k: v for k, v in sorted(vars(args).items()) if k != "image_path"},
+            "env": sorted((k, v) for k, v in os.environ.items() if k.startswith("SBM_")),
+            "rapidocr": rapidocr_version,
+            "script": [script.st_size, script.st_mtime_ns],
+            "models": model_file_stats(data_dir),
+        }
+        h.update(json.dumps(key, sort_keys=True).encode("utf-8"))
+
+        base = Path(data_dir).expanduser()
+        if base.name == "rapidocr-models":
+            base = base.parent
+        return base / "ocr-cache" / f"{h.hexdigest()}.json"
     except Exception:
-        return []
+        return None
 
-    variants = []
-    base = pil_img.convert("RGB")
 
-    if profile == "pdf":
-        w, h = base.size
-        scale = 2
+def model_file_stats(data_dir: str) -> list:
+    """
+    (path, size, mtime) of every ONNX model the engine can load: RapidOCR's package model dir and
+    the SBM_OCR_DATA_DIR model dir, which include the det/cls/rec files it resolves and their INT8
+    copies. Located without importing RapidOCR, so cache hits stay cheap.
+    """
+    dirs = []
+    try:
+        from importlib.util import find_spec
 
-        up = base.resize((w * scale, h * scale))
-        up = ImageOps.autocontrast(up)
-        up = ImageEnhance.Contrast(up).enhance(1.15)
-        up = ImageEnhance.Sharpness(up).enhance(1.6)
-        variants.append(("enhance2x", up))
+        spec = find_spec("rapidocr")
+        if spec is not None and spec.submodule_search_locations:
+            dirs.append(Path(list(spec.submodule_search_locations)[0]) / "models")
+    except Exception:
+        pass
+    base = Path(data_dir).expanduser()
+    dirs.append(base if base.name == "rapidocr-models" else base / "rapidocr-models")
 
-        if multipass >= 2:
-            gray = base.convert("L")
-            gray = ImageOps.autocontrast(gray)
-            gray = gray.resize((w * scale, h * scale))
-            variants.append(("gray2x", gray.convert("RGB")))
+    stats = []
+    for d in dirs:
+        with contextlib.suppress(OSError):
+            for p in sorted(d.glob("*.onnx")):
+                st = p.stat()
+                stats.append([str(p), st.st_size, st.st_mtime_ns])
+    return stats
 
-        if rotate180:
-            variants.append(("enhance2x_rot180", up.rotate(180, expand=True)))
 
-    return variants
+def read_ocr_cache(path: Path | None) -> str | None:
+    if path is None:
+        return None
+    try:
+        data = path.read_text(encoding="utf-8")
+        json.loads(data)
+        # Refresh mtime: eviction drops the least recently used entries first.
+        os.utime(path)
+        return data
+    except Exception:
+        return None
 
 
-def resolve_model_paths():
-    # 不使用自定义模型路径，直接交给 RapidOCR 内置下载/加载
-    return {}
+def write_ocr_cache(path: Path | None, data: str):
+    if path is None:
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(data, encoding="utf-8")
+        os.replace(tmp, path)
+
+        limit = safe_int(os.getenv("SBM_OCR_CACHE_MB"), 64) * 1024 * 1024
+        entries = []
+        total = 0
+        for p in path.parent.glob("*.json"):
+            st = p.stat()
+            entries.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+        if total > limit:
+            entries.sort()
+            for _, size, p in entries:
+                if total <= limit * 0.9:
+                    break
+                with contextlib.suppress(OSError):
+                    p.unlink()
+                    total -= size
+    except Exception:
+        pass
 
 
 def main():
@@ -382,6 +457,8 @@ def main():
     parser.add_argument("--min-height", type=int, default=None)
     parser.add_argument("--text-score", type=float, default=None)
     parser.add_argument("--debug", action="store_true")
+    # Input is already a single cropped text line/field: skip detection and angle classification.
+    parser.add_argument("--rec-only", action="store_true")
     args = parser.parse_args()
 
     if not args.image_path:
@@ -393,12 +470,21 @@ def main():
         print(json.dumps({"success": False, "error": f"Image file not found: {image_path}"}))
         sys.exit(1)
 
+    # Identical image + settings: reuse the stored result and skip loading RapidOCR at all.
+    cache_path = ocr_cache_path(args, image_path)
+    cached = read_ocr_cache(cache_path)
+    if cached is not None:
+        print(cached)
+        return
+
     engine = args.engine or os.getenv("SBM_OCR_ENGINE") or "rapidocr"
     engine = str(engine).strip().lower()
     # Be tolerant to old configs (e.g. SBM_OCR_ENGINE=openvino) and fall back to rapidocr.
     if engine != "rapidocr":
         engine = "rapidocr"
 
+    prefetch_model_files()
+
     # RapidOCR v3 (rapidocr + onnxruntime)
     try:
         with suppress_child_output():
@@ -413,7 +499,10 @@ def main():
 
             # 默认使用 RapidOCR 的内置默认模型/配置。
             # 只在 `profile=pdf` 或 CLI 参数显式指定时，覆盖少量 Global 参数。
-            params: dict = {}
+            params: dict = ort_engine_params()
+            openvino_params = openvino_engine_params(params.get("EngineConfig.onnxruntime.intra_op_num_threads", 0))
+            params.update(openvino_params)
+            params.update(rec_batch_params())
 
             # Optional: override RapidOCR's default model cache directory with a single mounted dir.
             # By default RapidOCR stores models under the Python package directory (rapidocr/models).
@@ -433,6 +522,12 @@ def main():
                 except Exception:
                     model_data_dir = ""
 
+            # The INT8 copies are quantized for onnxruntime; OpenVINO runs the stock models.
+            model_paths = {}
+            if not openvino_params:
+                model_paths = resolve_model_paths(str(InferSession.DEFAULT_MODEL_PATH) if model_data_dir else "")
+            params.update(model_paths)
+
             if args.profile == "pdf":
                 params.update(
                     {
@@ -441,6 +536,11 @@ def main():
                         "Global.text_score": 0.35,
                     }
                 )
+            else:
+                # Screenshots/photos: cap the working canvas; detection cost grows with the pixel count.
+                max_side_len = safe_int(os.getenv("SBM_OCR_MAX_SIDE_LEN"), 1280)
+                if max_side_len > 0:
+                    params["Global.max_side_len"] = max_side_len
 
             if args.max_side_len is not None:
                 params["Global.max_side_len"] = int(args.max_side_len)
@@ -449,28 +549,90 @@ def main():
             if args.text_score is not None:
                 params["Global.text_score"] = float(args.text_score)
 
+            call_kwargs = {"use_det": False, "use_cls": False} if args.rec_only else {}
+            rec_box = None
+            if args.rec_only:
+                try:
+                    from PIL import Image, ImageOps
+
+                    # RapidOCR applies the EXIF orientation when it loads the file, so size the box
+                    # from the transposed image (width/height swap for rotated crops).
+                    with Image.open(image_path) as im:
+                        w, h = (ImageOps.exif_transpose(im) or im).size
+                    rec_box = [[0.0, 0.0], [float(w), 0.0], [float(w), float(h)], [0.0, float(h)]]
+                except Exception:
+                    rec_box = None
+
+            multipass = safe_int(os.getenv("SBM_RAPIDOCR_MULTIPASS"), 1 if args.profile == "pdf" else 0)
+            if args.rec_only:
+                multipass = 0
+            rotate180 = truthy(os.getenv("SBM_RAPIDOCR_ROTATE180")) or (args.profile == "pdf")
+            debug = args.debug or truthy(os.getenv("SBM_OCR_DEBUG"))
+
+            # The image is decoded once and handed to RapidOCR as-is for the original pass.
+            # Variants are upscaled 2x and RapidOCR then shrinks anything above max_side_len again,
+            # so they are built from a reduced copy of large scans.
+            pil_img = load_pil_image(image_path) if multipass > 0 else None
+            max_side_len = int(params.get("Global.max_side_len") or 2000)
+            variants = build_variants(
+                shrink_pil_image(pil_img, max_side_len // 2), args.profile, multipass, rotate180, max_side_len
+            )
+
+            # With early exit enabled the original pass runs on its own first, so a confident result
+            # (typical for clean PDF pages) skips the variants entirely.
+            early_exit = bool(variants) and (
+                safe_float(os.getenv("SBM_OCR_EARLY_EXIT_SCORE"), 0.0) > 0
+                or safe_float(os.getenv("SBM_OCR_EARLY_EXIT_CONF"), 0.95) > 0
+            )
+
+            # The passes are independent, so they run concurrently when there are spare cores
+            # (onnxruntime releases the GIL). Concurrent runs on one session share its intra-op pool.
+            # Without early exit every pass, the original included, runs in the pool, so that pool is
+            # sized for one pass's share of the CPU. With early exit (the default) the original pass
+            # runs alone first and the variants reuse its full-thread engine rather than loading the
+            # models a second time.
+            concurrent_passes = len(variants) if early_exit else 1 + len(variants)
+            pool_size = min(concurrent_passes, safe_int(os.getenv("SBM_OCR_VARIANT_WORKERS"), os.cpu_count() or 1))
+            if pool_size > 1 and not early_exit:
+                threads = params.get("EngineConfig.onnxruntime.intra_op_num_threads") or os.cpu_count() or 1
+                params = dict(params)
+                params["EngineConfig.onnxruntime.intra_op_num_threads"] = max(1, threads // pool_size)
+                if "EngineConfig.openvino.inference_num_threads" in params:
+                    params["EngineConfig.openvino.inference_num_threads"] = max(1, threads // pool_size)
+
+            # Engines are created once and shared by the passes, so models/sessions are loaded a
+            # single time per invocation.
+            engines: dict = {}
+            engines_lock = threading.Lock()
+
+            def get_engine(kind: str = "default"):
+                with engines_lock:
+                    if kind not in engines:
+                        engines[kind] = RapidOCR() if kind == "fallback" else RapidOCR(params=params or None)
+                    return engines[kind]
+
             # Helper: run rapidocr with optional fallback to default params to avoid crashes such as
             # "list index out of range" from corrupted/partial models.
-            def run_with_fallback(path: str):
+            # `img` may be a file path, a decoded PIL image or an in-memory BGR ndarray.
+            def run_with_fallback(img):
                 errors: list[str] = []
                 param_summary = {
                     "rapidocr": rapidocr_version,
                     "ocr_version": "default",
-                    "det": "default",
-                    "rec": "default",
+                    "det": Path(model_paths["Det.model_path"]).name if model_paths else "default",
+                    "rec": Path(model_paths["Rec.model_path"]).name if model_paths else "default",
                     "cls": "default",
                     "dict": "default",
                     "model_dir": str(InferSession.DEFAULT_MODEL_PATH) if model_data_dir else "",
                 }
                 try:
-                    ocr = RapidOCR(params=params or None)
-                    out = ocr(path)
+                    out = get_engine()(img, **call_kwargs)
                     return out, "default", errors, param_summary
                 except Exception as e:
                     errors.append(f"default_failed: {e}")
                     try:
-                        ocr = RapidOCR()
-                        out = ocr(path)
+                        out = get_engine("fallback")(img, **call_kwargs)
+                        param_summary.update({"det": "default", "rec": "default"})
                         return out, "default", errors, param_summary
                     except Exception as e2:
                         errors.append(f"default_fallback_failed: {e2}")
@@ -480,29 +642,41 @@ def main():
                 txts = getattr(out, "txts", None) or ()
                 scores = getattr(out, "scores", None) or ()
                 boxes = getattr(out, "boxes", None)
-                if boxes is not None and hasattr(boxes, "tolist"):
-                    boxes = boxes.tolist()
+                n = len(txts)
+
+                # Keep the result columnar (texts / confidences / boxes) and only build the per-line
+                # dicts once, already in reading order.
+                confidences = [
+                    float(scores[i]) if i < len(scores) and scores[i] is not None else 0.0 for i in range(n)
+                ]
+                if getattr(boxes, "ndim", 0) == 3 and len(boxes) >= n:
+                    # Detector output is one (N, 4, 2) array: order on it directly and convert each
+                    # row to plain lists only while building its line.
+                    line_boxes = boxes[:n]
+                    order = box_reading_order(line_boxes)
+                else:
+                    if boxes is not None:
+                        line_boxes = list(boxes.tolist() if hasattr(boxes, "tolist") else boxes)[:n]
+                        line_boxes += [None] * (n - len(line_boxes))
+                    elif rec_box is not None:
+                        # rec-only: the whole image is the single text region.
+                        line_boxes = [rec_box] * n
+                    else:
+                        line_boxes = [None] * n
+                    order = box_reading_order(line_boxes)
+
+                ordered = []
+                for i in range(n) if order is None else order.tolist():
+                    line = {"text": txts[i], "confidence": confidences[i]}
+                    box = line_boxes[i]
+                    if box is not None:
+                        line["box"] = box.tolist() if hasattr(box, "tolist") else box
+                    ordered.append(line)
 
-                lines = []
-                full_text_parts = []
-                for idx, text in enumerate(txts):
-                    confidence = 0.0
-                    if idx < len(scores) and scores[idx] is not None:
-                        confidence = float(scores[idx])
-
-                    line = {"text": text, "confidence": confidence}
-                    if boxes is not None and idx < len(boxes):
-                        line["box"] = boxes[idx]
-
-                    lines.append(line)
-
-                ordered = reorder_lines_by_box(lines)
                 ordered = apply_label_value_layout(ordered, args.profile)
-                for ln in ordered:
-                    full_text_parts.append(ln.get("text") or "")
 
                 return {
-                    "text": "\n".join(full_text_parts),
+                    "text": "\n".join(ln.get("text") or "" for ln in ordered),
                     "lines": ordered,
                     "line_count": len(ordered),
                     "score": score_lines(ordered),
@@ -511,15 +685,48 @@ def main():
                     "params": param_summary,
                 }
 
-            def run_one(path: str):
-                out, backend, backend_errors, param_summary = run_with_fallback(path)
+            def run_one(img):
+                out, backend, backend_errors, param_summary = run_with_fallback(img)
                 return build_result(out, backend, backend_errors, param_summary)
 
-            multipass = safe_int(os.getenv("SBM_RAPIDOCR_MULTIPASS"), 1 if args.profile == "pdf" else 0)
-            rotate180 = truthy(os.getenv("SBM_RAPIDOCR_ROTATE180")) or (args.profile == "pdf")
-            debug = args.debug or truthy(os.getenv("SBM_OCR_DEBUG"))
-
-            best = run_one(image_path)
+            # Variants are passed to the shared engine as in-memory BGR ndarrays (no temp PNG files).
+            # Latency budget: once the passes so far took longer than SBM_OCR_BUDGET_MS, no further
+            # variant is started (0 = no limit). Passes already running concurrently still finish.
+            budget_ms = safe_int(os.getenv("SBM_OCR_BUDGET_MS"), 0)
+            t_start = time.perf_counter()
+
+            def over_budget() -> bool:
+                return budget_ms > 0 and (time.perf_counter() - t_start) * 1000.0 > budget_ms
+
+            inputs = [pil_img if pil_img is not None else image_path] + [arr for _, arr in variants]
+            results = []
+            if early_exit:
+                results.append(run_one(inputs.pop(0)))
+                if skip_remaining_variants(results[0]) or over_budget():
+                    inputs = []
+            if pool_size > 1 and inputs:
+                get_engine()
+                # The budget and early exit are checked before each further pass starts, just like
+                # on the serial path.
+                results.extend(
+                    run_passes_concurrently(
+                        run_one,
+                        inputs,
+                        pool_size,
+                        lambda done: over_budget() or (early_exit and any(map(skip_remaining_variants, done))),
+                    )
+                )
+            else:
+                for img in inputs:
+                    if results and over_budget():
+                        break
+                    r = run_one(img)
+                    results.append(r)
+                    if early_exit and skip_remaining_variants(r):
+                        break
+
+            # Pick the best pass in submission order, so ties resolve exactly as in a serial run.
+            best = results[0]
             best_variant = "original"
             variants_debug = []
             if debug:
@@ -527,38 +734,31 @@ def main():
                     {"variant": best_variant, "score": best["score"], "lines": best["line_count"], "chars": len(best["text"])}
                 )
 
-            pil_img = load_pil_image(image_path) if multipass > 0 else None
-            variants = build_variants(pil_img, args.profile, multipass, rotate180)
-
-            if variants:
-                with tempfile.TemporaryDirectory(prefix="sbm-ocr-") as td:
-                    for name, im in variants:
-                        out_path = str(Path(td) / f"{name}.png")
-                        try:
-                            im.save(out_path, format="PNG", optimize=True)
-                        except Exception:
-                            continue
-
-                        r = run_one(out_path)
-                        if debug:
-                            variants_debug.append(
-                                {
-                                    "variant": name,
-                                    "score": r["score"],
-                                    "lines": r["line_count"],
-                                    "chars": len(r["text"]),
-                                    "backend": r.get("backend", ""),
-                                    "backend_errors": r.get("backend_errors", []),
-                                }
-                            )
-                        if r["score"] > best["score"]:
-                            best = r
-                            best_variant = name
+            for (name, _), r in zip(variants, results[1:]):
+                if debug:
+                    variants_debug.append(
+                        {
+                            "variant": name,
+                            "score": r["score"],
+                            "lines": r["line_count"],
+                            "chars": len(r["text"]),
+                            "backend": r.get("backend", ""),
+                            "backend_errors": r.get("backend_errors", []),
+                        }
+                    )
+                if r["score"] > best["score"]:
+                    best = r
+                    best_variant = name
+
+            lines = best["lines"]
+            if os.getenv("SBM_OCR_INCLUDE_BOX") is not None and not truthy(os.getenv("SBM_OCR_INCLUDE_BOX")):
+                # The backend only needs text/confidence; dropping boxes shrinks the JSON a lot.
+                lines = [{k: v for k, v in ln.items() if k != "box"} for ln in lines]
 
             payload = {
                 "success": True,
                 "text": best["text"],
-                "lines": best["lines"],
+                "lines": lines,
                 "line_count": best["line_count"],
                 "engine": f"rapidocr-{rapidocr_version}",
                 "profile": args.profile,
@@ -570,7 +770,12 @@ def main():
             if debug:
                 payload["variants"] = variants_debug
 
-        print(json.dumps(payload, ensure_ascii=False))
+        output = dumps_json(payload)
+        if not payload.get("backend_errors"):
+            # Results from the default-params fallback engine are not stored: the next run should
+            # retry the configured engine instead of replaying a degraded result.
+            write_ocr_cache(cache_path, output)
+        print(output)
         return
 
     except ImportError:
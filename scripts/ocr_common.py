@@ -0,0 +1,467 @@
+"""
+Helpers shared by ocr_cli.py and ocr_worker.py: env parsing, RapidOCR engine params, model
+resolution, image decoding, multipass preprocessing variants and reading-order of OCR boxes.
+
+Both scripts import this module from their own directory, so it must be shipped next to them.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+
+
+def truthy(v: str | None) -> bool:
+    if v is None:
+        return False
+    return str(v).strip().lower() in ("1", "true", "yes", "y", "on")
+
+
+def safe_int(v: str | None, default: int) -> int:
+    try:
+        return int(str(v).strip())
+    except Exception:
+        return default
+
+
+def safe_float(v: str | None, default: float) -> float:
+    try:
+        return float(str(v).strip())
+    except Exception:
+        return default
+
+
+def skip_remaining_variants(result: dict) -> bool:
+    """
+    Early exit for multipass OCR: True when a pass is already good enough that running the
+    remaining preprocessing variants is wasted work. Either its score reaches
+    SBM_OCR_EARLY_EXIT_SCORE (default 0 = off), or it has at least SBM_OCR_EARLY_EXIT_MIN_LINES
+    lines (default 8) with an average confidence of SBM_OCR_EARLY_EXIT_CONF or more
+    (default 0.95; 0 = off).
+    """
+    min_score = safe_float(os.getenv("SBM_OCR_EARLY_EXIT_SCORE"), 0.0)
+    if min_score > 0 and result.get("score", 0.0) >= min_score:
+        return True
+
+    min_conf = safe_float(os.getenv("SBM_OCR_EARLY_EXIT_CONF"), 0.95)
+    lines = result.get("lines") or []
+    if min_conf <= 0 or len(lines) < max(1, safe_int(os.getenv("SBM_OCR_EARLY_EXIT_MIN_LINES"), 8)):
+        return False
+    avg_conf = sum(float(l.get("confidence") or 0.0) for l in lines) / len(lines)
+    return avg_conf >= min_conf
+
+
+def run_passes_concurrently(run, inputs, pool_size: int, stop) -> list:
+    """
+    Run `run(x)` for the `inputs` on up to `pool_size` threads and return the results in input order.
+    Passes are submitted lazily, at most `pool_size` in flight: before each pass after the first,
+    `stop(done)` is called with the results finished so far and ends submission when it returns
+    True (latency budget, early exit). Passes already running still finish.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    slots = threading.Semaphore(pool_size)
+    futures = []
+    with ThreadPoolExecutor(max_workers=pool_size) as pool:
+        for x in inputs:
+            slots.acquire()
+            if futures and stop([f.result() for f in futures if f.done()]):
+                break
+            fut = pool.submit(run, x)
+            fut.add_done_callback(lambda _: slots.release())
+            futures.append(fut)
+    return [f.result() for f in futures]
+
+
+def ort_engine_params(processes: int = 1) -> dict:
+    """
+    onnxruntime session tuning passed through RapidOCR's EngineConfig.
+    RapidOCR already builds sessions with ORT_ENABLE_ALL graph optimizations; here we size the
+    intra-op thread pool (SBM_ORT_THREADS, default: the CPUs split evenly between `processes`
+    concurrent OCR processes; 0 keeps onnxruntime's default) and enable the CPU memory arena so
+    buffers are reused across det/cls/rec runs.
+
+    SBM_OCR_DEVICE=auto|cpu|cuda|dml selects the execution provider; `auto` (default) uses CUDA
+    or DirectML only when the installed onnxruntime build exposes it, so CPU images are unaffected.
+    """
+    params = {"EngineConfig.onnxruntime.enable_cpu_mem_arena": True}
+    threads = safe_int(os.getenv("SBM_ORT_THREADS"), max(1, (os.cpu_count() or 1) // max(1, processes)))
+    if threads > 0:
+        params["EngineConfig.onnxruntime.intra_op_num_threads"] = threads
+
+    device = (os.getenv("SBM_OCR_DEVICE") or "auto").strip().lower()
+    if device != "cpu":
+        try:
+            import onnxruntime
+
+            providers = set(onnxruntime.get_available_providers())
+        except Exception:
+            providers = set()
+        if device in ("auto", "cuda") and "CUDAExecutionProvider" in providers:
+            params["EngineConfig.onnxruntime.use_cuda"] = True
+            # OCR input shapes vary per image; exhaustive cuDNN algo search would rerun for each one.
+            params["EngineConfig.onnxruntime.cuda_ep_cfg.cudnn_conv_algo_search"] = "DEFAULT"
+        elif device in ("auto", "dml") and "DmlExecutionProvider" in providers:
+            params["EngineConfig.onnxruntime.use_dml"] = True
+    return params
+
+
+def openvino_engine_params(threads: int = 0) -> dict:
+    """
+    SBM_OCR_INFER_ENGINE=openvino runs det/cls/rec through OpenVINO instead of onnxruntime: the same
+    PP-OCR ONNX models on Intel's CPU kernels, typically 30-40% faster on x86. Returns an empty
+    dict (stay on onnxruntime) when not selected or when the `openvino` package is missing.
+    onnxruntime remains the default since the INT8 models and GPU providers target it.
+    """
+    if (os.getenv("SBM_OCR_INFER_ENGINE") or "onnxruntime").strip().lower() != "openvino":
+        return {}
+    try:
+        import openvino  # noqa: F401
+        from rapidocr import EngineType
+    except Exception:
+        return {}
+
+    params = {f"{module}.engine_type": EngineType.OPENVINO for module in ("Det", "Cls", "Rec")}
+    if threads > 0:
+        params["EngineConfig.openvino.inference_num_threads"] = threads
+    return params
+
+
+def rec_batch_params() -> dict:
+    """
+    Recognizer batch size for RapidOCR (SBM_OCR_REC_BATCH, default 16; 0 keeps RapidOCR's 6).
+    Text-line crops are sorted by aspect ratio before batching, so larger batches add little
+    padding while cutting the number of recognizer session runs on line-heavy invoices.
+    """
+    batch = safe_int(os.getenv("SBM_OCR_REC_BATCH"), 16)
+    if batch <= 0:
+        return {}
+    return {"Rec.rec_batch_num": batch}
+
+
+def prefetch_model_files():
+    """
+    Ask the kernel to start reading RapidOCR's ONNX models (POSIX_FADV_WILLNEED) so that on a
+    cold page cache the disk read-ahead overlaps with the slow rapidocr/onnxruntime imports
+    instead of stalling session creation. Best-effort; a no-op where fadvise is unavailable.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+
+    dirs = []
+    model_data_dir = (os.getenv("SBM_OCR_DATA_DIR") or os.getenv("SBM_DATA_DIR") or "").strip()
+    if model_data_dir:
+        base = Path(model_data_dir).expanduser()
+        dirs.append(base if base.name == "rapidocr-models" else base / "rapidocr-models")
+    try:
+        from importlib.util import find_spec
+
+        spec = find_spec("rapidocr")
+        for loc in (spec.submodule_search_locations or []) if spec else []:
+            dirs.append(Path(loc) / "models")
+    except Exception:
+        pass
+
+    for d in dirs:
+        try:
+            paths = list(d.glob("*.onnx"))
+        except OSError:
+            continue
+        for p in paths:
+            try:
+                fd = os.open(p, os.O_RDONLY)
+                try:
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                finally:
+                    os.close(fd)
+            except OSError:
+                continue
+
+
+def load_pil_image(path: str):
+    """
+    Open and decode an image once, EXIF-orientation applied exactly like RapidOCR's own loader,
+    so the same decoded image can feed both the original pass and the variants.
+    """
+    try:
+        from PIL import Image, ImageOps
+
+        im = Image.open(path)
+        im = ImageOps.exif_transpose(im) or im
+        im.load()
+        return im
+    except Exception:
+        return None
+
+
+def pil_to_bgr(im):
+    """
+    Convert a PIL image into the BGR ndarray layout RapidOCR expects for in-memory input,
+    so variants can be handed over without a PNG encode/decode roundtrip.
+    """
+    import numpy as np
+
+    arr = np.asarray(im.convert("RGB"))
+    return np.ascontiguousarray(arr[:, :, ::-1])
+
+
+def box_extents(box):
+    """
+    (minx, maxx, miny, maxy) of a box polygon in a single pass, or None when it has no [x, y] point.
+    """
+    minx = maxx = miny = maxy = None
+    for p in box:
+        if not isinstance(p, (list, tuple)) or len(p) < 2:
+            continue
+        x, y = p[0], p[1]
+        if minx is None:
+            minx = maxx = x
+            miny = maxy = y
+            continue
+        if x < minx:
+            minx = x
+        elif x > maxx:
+            maxx = x
+        if y < miny:
+            miny = y
+        elif y > maxy:
+            maxy = y
+    if minx is None:
+        return None
+    return minx, maxx, miny, maxy
+
+
+def reorder_lines_by_box(lines: list[dict]) -> list[dict]:
+    """
+    Reorder OCR lines based on bounding boxes:
+    - Cluster by Y (row) with a tolerance based on median height
+    - Sort rows by top, and items within a row by left
+    If boxes are missing, original order is kept.
+    """
+    order = box_reading_order([line.get("box") for line in lines])
+    if order is None:
+        return lines
+    return [lines[i] for i in order.tolist()]
+
+
+def box_reading_order(boxes):
+    """
+    Reading order of OCR lines as an index permutation over their boxes (see reorder_lines_by_box).
+    `boxes` is a list of per-line boxes or an (N, 4, 2) array. Lines without a usable box are
+    left out; returns None when no line has one.
+    """
+    if boxes is None or len(boxes) == 0:
+        return None
+
+    import numpy as np
+
+    # Fast path: RapidOCR returns one quad per line, so all boxes stack into a single (N, 4, 2) array.
+    try:
+        arr = np.asarray(boxes, dtype=np.float64)
+    except Exception:
+        arr = None
+    if arr is not None and arr.ndim == 3 and arr.shape[1] > 0 and arr.shape[2] >= 2:
+        kept = np.arange(len(boxes))
+        xs = arr[:, :, 0]
+        ys = arr[:, :, 1]
+        minx, maxx = xs.min(axis=1), xs.max(axis=1)
+        miny, maxy = ys.min(axis=1), ys.max(axis=1)
+    else:
+        kept = []
+        extents = []
+        for i, box in enumerate(boxes):
+            if not box:
+                continue
+            try:
+                ext = box_extents(box)
+                if ext is None:
+                    continue
+                extents.append(tuple(float(v) for v in ext))
+                kept.append(i)
+            except Exception:
+                continue
+        if not kept:
+            return None
+        kept = np.asarray(kept, dtype=np.int64)
+        minx, maxx, miny, maxy = np.asarray(extents, dtype=np.float64).T
+
+    if len(kept) == 1:
+        return kept
+
+    heights = np.maximum(maxy - miny, 1.0)
+    row_tol = max(5.0, float(np.median(heights)) * 0.6)
+
+    # All tops within one tolerance band can never start a new row (e.g. a single-line receipt
+    # strip): the order is simply by left, ties by top.
+    if float(miny.max() - miny.min()) <= row_tol:
+        return kept[np.lexsort((miny, minx))]
+
+    # Sort by (top, left); a new row starts when a box's top is below the lowest bottom seen so far.
+    order = np.lexsort((minx, miny))
+    top = miny[order]
+    bottom = np.maximum.accumulate(maxy[order])
+    breaks = np.empty(len(order), dtype=np.int64)
+    breaks[0] = 0
+    breaks[1:] = top[1:] > bottom[:-1] + row_tol
+    row_id = np.cumsum(breaks)
+
+    # Items within a row by left (stable, so ties keep the (top, left) order).
+    order = order[np.lexsort((minx[order], row_id))]
+    return kept[order]
+
+
+def build_variants(pil_img, profile: str, multipass: int, rotate180: bool, max_side: int = 4096):
+    """
+    Build preprocessing variants as BGR ndarrays (ready for RapidOCR) using OpenCV kernels.
+
+    The steps mirror the original PIL chain (2x bicubic upscale, autocontrast, contrast 1.15,
+    sharpness 1.6, optional gray/rot180 variants); point operations are applied as uint8 LUTs.
+    The upscale is capped so the long side stays within `max_side` (RapidOCR would only shrink it
+    again) and skipped when the page is already that large.
+    """
+    if pil_img is None or multipass <= 0:
+        return []
+
+    try:
+        import cv2
+        import numpy as np
+    except Exception:
+        return []
+
+    ramp = np.arange(256, dtype=np.float32)
+
+    def autocontrast(img):
+        # Same as ImageOps.autocontrast(cutoff=0): stretch each channel's [min, max] to [0, 255].
+        channels = cv2.split(img) if img.ndim == 3 else [img]
+        luts = []
+        for ch in channels:
+            lo, hi = cv2.minMaxLoc(ch)[:2]
+            if hi <= lo:
+                luts.append(np.arange(256, dtype=np.uint8))
+                continue
+            scale = 255.0 / (hi - lo)
+            luts.append(np.clip(np.trunc(ramp * scale - lo * scale), 0, 255).astype(np.uint8))
+        return cv2.LUT(img, np.dstack(luts) if len(luts) > 1 else luts[0])
+
+    def contrast(img, factor: float):
+        # Same as ImageEnhance.Contrast: blend with the mean gray level.
+        mean = int(cv2.mean(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY))[0] + 0.5)
+        lut = np.clip(np.trunc(mean + factor * (ramp - mean)), 0, 255).astype(np.uint8)
+        return cv2.LUT(img, lut)
+
+    def sharpness(img, factor: float):
+        # Same as ImageEnhance.Sharpness: blend with the PIL SMOOTH-filtered image.
+        smooth = cv2.filter2D(img, -1, np.array([[1, 1, 1], [1, 5, 1], [1, 1, 1]], np.float32) / 13.0)
+        return cv2.addWeighted(img, factor, smooth, 1.0 - factor, 0)
+
+    variants = []
+    try:
+        base = pil_to_bgr(pil_img)
+    except Exception:
+        return []
+
+    if profile == "pdf":
+        h, w = base.shape[:2]
+        scale = min(2.0, max_side / max(w, h)) if max_side > 0 else 2.0
+        size = (w, h) if scale <= 1.05 else (int(w * scale + 0.5), int(h * scale + 0.5))
+
+        up = base if size == (w, h) else cv2.resize(base, size, interpolation=cv2.INTER_CUBIC)
+        up = autocontrast(up)
+        up = contrast(up, 1.15)
+        up = sharpness(up, 1.6)
+        variants.append(("enhance2x", up))
+
+        if multipass >= 2:
+            gray = autocontrast(cv2.cvtColor(base, cv2.COLOR_BGR2GRAY))
+            if size != (w, h):
+                gray = cv2.resize(gray, size, interpolation=cv2.INTER_CUBIC)
+            variants.append(("gray2x", cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)))
+
+        if rotate180:
+            variants.append(("enhance2x_rot180", cv2.rotate(up, cv2.ROTATE_180)))
+
+    return variants
+
+
+def cpu_has_vnni() -> bool:
+    """
+    True when the CPU advertises AVX-512 VNNI or AVX-VNNI (int8 dot-product instructions), which is
+    where INT8 models are clearly faster than FP32. Linux only (/proc/cpuinfo); False elsewhere.
+    """
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    flags = set(line.split(":", 1)[-1].split())
+                    return "avx512_vnni" in flags or "avx_vnni" in flags
+    except OSError:
+        pass
+    return False
+
+
+def rapidocr_model_path(task: str, model_dir: str = "") -> Path | None:
+    """
+    The model file RapidOCR itself loads for `task` (det/cls/rec) with its default config: the same
+    lookup its onnxruntime session does (config.yaml -> model list -> file name under the model root).
+    None when it cannot be resolved or the file is not there yet.
+    """
+    try:
+        import rapidocr
+        from rapidocr.inference_engine.base import FileInfo, InferSession
+        from rapidocr.utils.parse_parameters import ParseParams
+
+        pkg_dir = Path(rapidocr.__file__).resolve().parent
+        cfg = ParseParams.load(pkg_dir / "config.yaml")
+        task_cfg = cfg[task.capitalize()]
+        info = InferSession.get_model_url(
+            FileInfo(
+                engine_type=task_cfg.engine_type,
+                ocr_version=task_cfg.ocr_version,
+                task_type=task_cfg.task_type,
+                lang_type=task_cfg.lang_type,
+                model_type=task_cfg.model_type,
+            )
+        )
+        root = model_dir or cfg.Global.get("model_root_dir") or getattr(InferSession, "DEFAULT_MODEL_PATH", None)
+        path = Path(root or pkg_dir / "models") / Path(info["model_dir"]).name
+        return path if path.is_file() else None
+    except Exception:
+        return None
+
+
+def resolve_model_paths(model_dir: str = "") -> dict:
+    """
+    Model path overrides for RapidOCR params.
+
+    By default nothing is overridden and RapidOCR downloads/loads its built-in models.
+    With `SBM_OCR_QUANT=int8` (opt-in), weights-only INT8 copies of the det/rec models are created
+    once (onnxruntime `quantize_dynamic`) next to the FP32 files RapidOCR resolves and used instead;
+    `auto` does so only on CPUs with VNNI, `fp32` (default) never. Dynamic quantization can cost
+    recognition accuracy, so check results on your own documents before enabling it. Any failure
+    (no `onnx` package, models not downloaded yet, read-only dir) keeps the FP32 defaults.
+    """
+    quant = (os.getenv("SBM_OCR_QUANT") or "fp32").strip().lower()
+    if quant == "auto":
+        quant = "int8" if cpu_has_vnni() else "fp32"
+    if quant != "int8":
+        return {}
+
+    out: dict = {}
+    for key, task in (("Det.model_path", "det"), ("Rec.model_path", "rec")):
+        src = rapidocr_model_path(task, model_dir)
+        if src is None:
+            return {}
+        dst = src.with_name(f"{src.stem}.int8.onnx")
+        try:
+            if not dst.exists() or dst.stat().st_mtime < src.stat().st_mtime:
+                # Only pay for importing the quantization toolkit (and onnx) when a model is (re)built.
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+
+                tmp = dst.with_name(f"{dst.name}.{os.getpid()}.tmp")
+                quantize_dynamic(str(src), str(tmp), weight_type=QuantType.QInt8)
+                os.replace(tmp, dst)
+        except Exception:
+            return {}
+        out[key] = str(dst)
+    return out
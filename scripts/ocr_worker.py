@@ -13,50 +13,114 @@ Goal: keep RapidOCR models loaded once to avoid per-request Python startup overh
 
 from __future__ import annotations
 
-import contextlib
+import bisect
 import json
 import os
 import sys
-import tempfile
+import threading
+import time
 import traceback
+from collections import OrderedDict
+from collections.abc import Mapping
 from importlib import metadata
 from pathlib import Path
+from types import MappingProxyType
+
+from ocr_common import (
+    build_variants,
+    load_pil_image,
+    openvino_engine_params,
+    ort_engine_params,
+    prefetch_model_files,
+    rec_batch_params,
+    reorder_lines_by_box,
+    resolve_model_paths,
+    run_passes_concurrently,
+    safe_int,
+    skip_remaining_variants,
+    truthy,
+)
+
+try:
+    # Optional: orjson encodes responses with hundreds of lines/boxes several times faster.
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Protocol responses go here; see redirect_child_output().
+_protocol_out = sys.stdout.buffer
+
+
+def redirect_child_output(debug: bool):
+    """
+    Move the JSON-lines protocol to a private dup of stdout and point fd 1 once, for the whole
+    process, at /dev/null (or at stderr with `debug`), so third-party Python or native output
+    (RapidOCR logs, onnxruntime, OpenCV) can never interleave with responses.
+    """
+    global _protocol_out
+    sys.stdout.flush()
+    out_fd = os.dup(1)
+    target = os.dup(2) if debug else os.open(os.devnull, os.O_WRONLY)
+    try:
+        os.dup2(target, 1)
+        if not debug:
+            os.dup2(target, 2)
+    finally:
+        os.close(target)
+    _protocol_out = os.fdopen(out_fd, "wb")
 
 
-@contextlib.contextmanager
-def suppress_child_output(enabled: bool):
-    if not enabled:
-        yield
-        return
-
-    devnull = open(os.devnull, "w")
-    old_stdout_fd = os.dup(1)
-    old_stderr_fd = os.dup(2)
+def image_digest(path: str) -> str | None:
+    """
+    Content hash of an image file for the worker's result cache: xxh3 when the `xxhash` package
+    is installed, blake2b otherwise. Returns None if the file cannot be read.
+    """
     try:
-        os.dup2(devnull.fileno(), 1)
-        os.dup2(devnull.fileno(), 2)
-        yield
-    finally:
+        import hashlib
+
         try:
-            os.dup2(old_stdout_fd, 1)
-            os.dup2(old_stderr_fd, 2)
-        finally:
-            os.close(old_stdout_fd)
-            os.close(old_stderr_fd)
-            devnull.close()
+            import xxhash
+
+            new_hash = xxhash.xxh3_128
+        except ImportError:
+            from functools import partial
+
+            new_hash = partial(hashlib.blake2b, digest_size=20)
+
+        with open(path, "rb") as f:
+            if hasattr(hashlib, "file_digest"):
+                h = hashlib.file_digest(f, new_hash)
+            else:
+                h = new_hash()
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+        return h.hexdigest()
+    except Exception:
+        return None
 
 
-def truthy(v: str | None) -> bool:
-    if v is None:
-        return False
-    return str(v).strip().lower() in ("1", "true", "yes", "y", "on")
+def copy_payload(payload: dict) -> dict:
+    """
+    Copy of a recognize() payload for the result cache that shares no mutable member with it:
+    the lines (and their boxes), params and backend errors are copied too, so a caller that
+    edits a returned payload cannot change what later cache hits return.
+    """
+    out = dict(payload)
+    out["lines"] = [
+        {**ln, "box": [list(p) for p in ln["box"]]} if isinstance(ln.get("box"), list) else dict(ln)
+        for ln in payload.get("lines") or []
+    ]
+    out["params"] = dict(payload.get("params") or {})
+    out["backend_errors"] = list(payload.get("backend_errors") or [])
+    return out
 
 
-def safe_int(v: str | None, default: int) -> int:
-    try:
-        return int(str(v).strip())
-    except Exception:
-        return default
+# In UTF-8, U+4E00..U+9FFF is encoded as E4 B8..BF xx or E5..E9 xx xx (lead bytes never
+# appear as continuation bytes), so CJK ideographs can be counted on the encoded bytes.
+_NON_CJK_LEAD_BYTES = bytes(c for c in range(256) if not 0xE5 <= c <= 0xE9)
+_CJK_E4_PREFIXES = tuple(bytes((0xE4, c)) for c in range(0xB8, 0xC0))
+_NON_DIGIT_BYTES = bytes(c for c in range(256) if not 0x30 <= c <= 0x39)
 
 
 def score_lines(lines: list[dict]) -> float:
@@ -64,102 +128,62 @@ def score_lines(lines: list[dict]) -> float:
         return 0.0
 
     total_conf = 0.0
-    total_len = 0
-    cjk = 0
-    digits = 0
+    texts = []
     for l in lines:
-        t = l.get("text") or ""
-        total_len += len(t)
+        texts.append(str(l.get("text") or ""))
         total_conf += float(l.get("confidence") or 0.0)
-        for ch in t:
-            o = ord(ch)
-            if 0x4E00 <= o <= 0x9FFF:
-                cjk += 1
-            elif "0" <= ch <= "9":
-                digits += 1
+
+    # One C-level scan over the joined UTF-8 bytes instead of a Python loop per character.
+    joined = "".join(texts)
+    b = joined.encode("utf-8", "surrogatepass")
+    total_len = len(joined)
+    cjk = len(b.translate(None, _NON_CJK_LEAD_BYTES)) + sum(b.count(p) for p in _CJK_E4_PREFIXES)
+    digits = len(b.translate(None, _NON_DIGIT_BYTES))
 
     avg_conf = total_conf / max(len(lines), 1)
     content = (cjk * 2.0) + (digits * 1.2) + (max(total_len - cjk - digits, 0) * 0.25)
     return (content + (len(lines) * 10.0)) * (0.25 + avg_conf)
 
 
-def load_pil_image(path: str):
+def load_reduced_bgr(path: str, max_side: int):
+    """
+    Decode a large JPEG directly at 1/2 or 1/4 resolution (libjpeg scales in the DCT domain) when
+    RapidOCR would shrink it below `max_side` anyway. Returns (bgr, scale) where `scale` maps box
+    coordinates back to the full-size image, or (None, 1.0) when the fast path does not apply.
+
+    Opt-in (SBM_OCR_FAST_DECODE): detection sees the same resolution, but RapidOCR crops the
+    recognizer's inputs from the array it receives, so small print is recognized at 1/2-1/4 of
+    its original size. This trades recognition quality for decode time.
+    """
+    if max_side <= 0:
+        return None, 1.0
     try:
+        import cv2
+        import numpy as np
         from PIL import Image
 
-        im = Image.open(path)
-        im.load()
-        return im
-    except Exception:
-        return None
-
-
-def reorder_lines_by_box(lines: list[dict]) -> list[dict]:
-    if not lines:
-        return lines
-
-    processed = []
-    for line in lines:
-        box = line.get("box") or []
-        if not box:
-            continue
-        try:
-            xs = [p[0] for p in box if isinstance(p, (list, tuple)) and len(p) >= 2]
-            ys = [p[1] for p in box if isinstance(p, (list, tuple)) and len(p) >= 2]
-            if not xs or not ys:
-                continue
-            minx, maxx = min(xs), max(xs)
-            miny, maxy = min(ys), max(ys)
-            processed.append(
-                {
-                    "line": line,
-                    "minx": minx,
-                    "maxx": maxx,
-                    "miny": miny,
-                    "maxy": maxy,
-                    "height": max(1.0, maxy - miny),
-                }
-            )
-        except Exception:
-            continue
-
-    if not processed:
-        return lines
-
-    heights = sorted(p["height"] for p in processed)
-    mid = len(heights) // 2
-    median_h = heights[mid] if len(heights) % 2 else (heights[mid - 1] + heights[mid]) / 2
-    row_tol = max(5.0, median_h * 0.6)
-
-    processed.sort(key=lambda p: (p["miny"], p["minx"]))
-
-    rows: list[list[dict]] = []
-    current_row: list[dict] = []
-    current_maxy = None
-    for p in processed:
-        if current_row and current_maxy is not None and p["miny"] > current_maxy + row_tol:
-            rows.append(current_row)
-            current_row = [p]
-            current_maxy = p["maxy"]
+        # Header only; other formats (e.g. PNG with alpha) keep RapidOCR's own loader.
+        with Image.open(path) as im:
+            if im.format != "JPEG":
+                return None, 1.0
+            long_side = max(im.size)
+        if long_side >= 4 * max_side:
+            flag = cv2.IMREAD_REDUCED_COLOR_4
+        elif long_side >= 2 * max_side:
+            flag = cv2.IMREAD_REDUCED_COLOR_2
         else:
-            current_row.append(p)
-            current_maxy = p["maxy"] if current_maxy is None else max(current_maxy, p["maxy"])
-    if current_row:
-        rows.append(current_row)
-
-    ordered = []
-    for row in rows:
-        row.sort(key=lambda p: p["minx"])
-        ordered.extend(row)
-
-    return [p["line"] for p in ordered]
+            return None, 1.0
+        # imdecode applies the EXIF orientation, like RapidOCR's loader.
+        arr = cv2.imdecode(np.fromfile(path, dtype=np.uint8), flag)
+        if arr is None:
+            return None, 1.0
+        return arr, long_side / max(arr.shape[:2])
+    except Exception:
+        return None, 1.0
 
 
-def apply_label_value_layout(lines: list[dict], profile: str) -> list[dict]:
-    if profile != "default" or not lines:
-        return lines
-
-    label_set = {
+_BILL_DETAIL_LABELS = frozenset(
+    {
         "交易单号",
         "交易号",
         "商户单号",
@@ -185,60 +209,66 @@ def apply_label_value_layout(lines: list[dict], profile: str) -> list[dict]:
         "商品",
         "商品说明",
     }
+)
 
-    def norm(t: str) -> str:
-        return str(t or "").strip()
 
-    def is_label(t: str) -> bool:
-        return norm(t) in label_set
+def _norm_text(t: str) -> str:
+    return str(t or "").strip()
 
-    def box_of(line: dict):
-        box = line.get("box") or []
-        if not isinstance(box, (list, tuple)) or not box:
-            return None
-        try:
-            xs = [p[0] for p in box if isinstance(p, (list, tuple)) and len(p) >= 2]
-            ys = [p[1] for p in box if isinstance(p, (list, tuple)) and len(p) >= 2]
-            if not xs or not ys:
-                return None
-            left = float(min(xs))
-            right = float(max(xs))
-            top = float(min(ys))
-            bottom = float(max(ys))
-            return {
-                "left": left,
-                "right": right,
-                "top": top,
-                "bottom": bottom,
-                "cx": (left + right) / 2.0,
-                "cy": (top + bottom) / 2.0,
-            }
-        except Exception:
+
+def _label_box(line: dict):
+    box = line.get("box") or []
+    if not isinstance(box, (list, tuple)) or not box:
+        return None
+    try:
+        xs = [p[0] for p in box if isinstance(p, (list, tuple)) and len(p) >= 2]
+        ys = [p[1] for p in box if isinstance(p, (list, tuple)) and len(p) >= 2]
+        if not xs or not ys:
             return None
+        left = float(min(xs))
+        right = float(max(xs))
+        top = float(min(ys))
+        bottom = float(max(ys))
+        return {
+            "left": left,
+            "right": right,
+            "top": top,
+            "bottom": bottom,
+            "cx": (left + right) / 2.0,
+            "cy": (top + bottom) / 2.0,
+        }
+    except Exception:
+        return None
 
-    idx_by_line = {id(l): i for i, l in enumerate(lines)}
-    geo = [(l, box_of(l)) for l in lines]
+
+def apply_label_value_layout(lines: list[dict], profile: str) -> list[dict]:
+    if profile != "default" or not lines:
+        return lines
+
+    geo = [_label_box(l) for l in lines]
+    texts = [_norm_text(l.get("text") or "") for l in lines]
+
+    # Candidate values sorted by vertical center, so each label only scans its +-22px row band.
+    by_cy = sorted((b["cy"], i) for i, b in enumerate(geo) if b is not None)
+    cys = [cy for cy, _ in by_cy]
 
     used = set()
     out = list(lines)
 
-    for label_line, label_box in geo:
-        if label_box is None:
+    for label_idx, label_box in enumerate(geo):
+        if label_box is None or label_idx in used:
             continue
-        if not is_label(label_line.get("text") or ""):
-            continue
-        label_idx = idx_by_line.get(id(label_line))
-        if label_idx is None or label_idx in used:
+        if texts[label_idx] not in _BILL_DETAIL_LABELS:
             continue
 
         best = None
         best_score = 1e18
-        for value_line, value_box in geo:
-            if value_box is None:
-                continue
-            value_idx = idx_by_line.get(id(value_line))
-            if value_idx is None or value_idx == label_idx or value_idx in used:
+        lo = bisect.bisect_left(cys, label_box["cy"] - 22.001)
+        hi = bisect.bisect_right(cys, label_box["cy"] + 22.001)
+        for _, value_idx in by_cy[lo:hi]:
+            if value_idx == label_idx or value_idx in used:
                 continue
+            value_box = geo[value_idx]
 
             # Value should be on the right side of the label, roughly aligned by row.
             if value_box["left"] < label_box["right"] - 5:
@@ -248,16 +278,18 @@ def apply_label_value_layout(lines: list[dict], profile: str) -> list[dict]:
             if dy > 22:
                 continue
             score = (dy * 10.0) + dx
-            if score < best_score:
+            # Ties go to the earliest line, as in a scan in line order.
+            if score < best_score or (score == best_score and value_idx < best):
                 best_score = score
                 best = value_idx
 
         if best is not None:
-            val = norm(out[best].get("text") or "")
+            # out[], not texts[]: the value may be a label line that was already merged.
+            val = _norm_text(out[best].get("text") or "")
             if val:
                 out[label_idx] = {
                     **out[label_idx],
-                    "text": f"{norm(out[label_idx].get('text') or '')}：{val}",
+                    "text": f"{texts[label_idx]}：{val}",
                 }
                 used.add(best)
 
@@ -267,39 +299,6 @@ def apply_label_value_layout(lines: list[dict], profile: str) -> list[dict]:
     return [l for i, l in enumerate(out) if i not in used]
 
 
-def build_variants(pil_img, profile: str, multipass: int, rotate180: bool):
-    if pil_img is None:
-        return []
-    try:
-        from PIL import ImageEnhance, ImageOps
-    except Exception:
-        return []
-
-    variants = []
-    base = pil_img.convert("RGB")
-
-    if profile == "pdf":
-        w, h = base.size
-        scale = 2
-
-        up = base.resize((w * scale, h * scale))
-        up = ImageOps.autocontrast(up)
-        up = ImageEnhance.Contrast(up).enhance(1.15)
-        up = ImageEnhance.Sharpness(up).enhance(1.6)
-        variants.append(("enhance2x", up))
-
-        if multipass >= 2:
-            gray = base.convert("L")
-            gray = ImageOps.autocontrast(gray)
-            gray = gray.resize((w * scale, h * scale))
-            variants.append(("gray2x", gray.convert("RGB")))
-
-        if rotate180:
-            variants.append(("enhance2x_rot180", up.rotate(180, expand=True)))
-
-    return variants
-
-
 def configure_model_dir(InferSession):
     model_data_dir = (os.getenv("SBM_OCR_DATA_DIR") or os.getenv("SBM_DATA_DIR") or "").strip()
     if not model_data_dir:
@@ -317,19 +316,28 @@ def configure_model_dir(InferSession):
         return None
 
 
+# Scanned PDF pages: keep the full render resolution and accept smaller/fainter text.
+_PDF_OVERRIDES = MappingProxyType({"max_side_len": 4096, "min_height": 10, "text_score": 0.35})
+
+
 class RapidOCRWorker:
     def __init__(self):
         self._ok = False
         self._error = ""
         self._rapidocr_version = "unknown"
         self._model_dir = None
-        self._ocr_by_profile = {}
-        self._stderr_suppress = not truthy(os.getenv("SBM_OCR_WORKER_DEBUG"))
-
+        self._model_paths = {}
+        self._ocr = None
+        self._ocr_defaults = {}
+        self._engine_lock = threading.Lock()
+        # (image digest, profile) -> payload, least recently used first.
+        self._result_cache = OrderedDict()
+        self._result_cache_size = max(0, safe_int(os.getenv("SBM_OCR_WORKER_CACHE"), 256))
+
+        prefetch_model_files()
         try:
-            with suppress_child_output(self._stderr_suppress):
-                from rapidocr import RapidOCR
-                from rapidocr.inference_engine.base import InferSession
+            from rapidocr import RapidOCR
+            from rapidocr.inference_engine.base import InferSession
 
             try:
                 self._rapidocr_version = metadata.version("rapidocr")
@@ -337,6 +345,9 @@ class RapidOCRWorker:
                 pass
 
             self._model_dir = configure_model_dir(InferSession)
+            if not openvino_engine_params():
+                # The INT8 copies are quantized for onnxruntime; OpenVINO runs the stock models.
+                self._model_paths = resolve_model_paths(self._model_dir or "")
 
             self._RapidOCR = RapidOCR
             self._InferSession = InferSession
@@ -347,37 +358,66 @@ class RapidOCRWorker:
 
         warmup = truthy(os.getenv("SBM_OCR_WORKER_WARMUP")) or os.getenv("SBM_OCR_WORKER_WARMUP") is None
         if self._ok and warmup:
-            # Best-effort warmup to reduce first-request jitter.
+            # Best-effort warmup to reduce first-request jitter. Building the sessions is only half of
+            # it: onnxruntime also allocates its memory arena and picks kernels on the first run, so
+            # push a tiny synthetic line through det/cls/rec once.
             try:
-                self._get_ocr("default")
-                self._get_ocr("pdf")
+                import numpy as np
+
+                probe = np.full((48, 320, 3), 255, dtype=np.uint8)
+                probe[16:32, 24:296] = 0
+                self._get_ocr("default")(probe)
             except Exception:
                 # keep worker alive even if warmup fails
                 pass
 
-    def _profile_params(self, profile: str) -> dict:
+    def _engine_params(self) -> dict:
+        # SBM_OCR_WORKERS worker processes share the CPUs.
+        params = ort_engine_params(safe_int(os.getenv("SBM_OCR_WORKERS"), 1))
+        openvino_params = openvino_engine_params(params.get("EngineConfig.onnxruntime.intra_op_num_threads", 0))
+        params.update(openvino_params)
+        params.update(rec_batch_params())
+        params.update(self._model_paths)
+        return params
+
+    def _profile_overrides(self, profile: str) -> Mapping[str, float]:
+        """
+        Per-profile scalar thresholds. They are plain attributes that RapidOCR reads on every call,
+        so both profiles share one engine (one set of det/cls/rec sessions) instead of loading the
+        models twice; unset keys fall back to the engine's configured defaults.
+        """
         if profile == "pdf":
-            return {
-                "Global.max_side_len": 4096,
-                "Global.min_height": 10,
-                "Global.text_score": 0.35,
-            }
+            return _PDF_OVERRIDES
+        # Screenshots/photos: cap the working canvas; detection cost grows with the pixel count.
+        max_side_len = safe_int(os.getenv("SBM_OCR_MAX_SIDE_LEN"), 1280)
+        if max_side_len > 0:
+            return {"max_side_len": max_side_len}
         return {}
 
     def _get_ocr(self, profile: str):
         profile = (profile or "default").strip().lower()
         if profile not in ("default", "pdf"):
             profile = "default"
-        if profile in self._ocr_by_profile:
-            return self._ocr_by_profile[profile]
-
-        params = self._profile_params(profile)
-        with suppress_child_output(self._stderr_suppress):
-            ocr = self._RapidOCR(params=params or None)
-        self._ocr_by_profile[profile] = ocr
+        with self._engine_lock:
+            if self._ocr is None:
+                ocr = self._RapidOCR(params=self._engine_params() or None)
+                self._ocr_defaults = {k: getattr(ocr, k) for k in ("max_side_len", "min_height", "text_score")}
+                self._ocr = ocr
+            ocr = self._ocr
+
+        # Requests are handled one at a time, so switching thresholds here cannot race another profile.
+        overrides = self._profile_overrides(profile)
+        for key, default in self._ocr_defaults.items():
+            setattr(ocr, key, overrides.get(key, default))
         return ocr
 
-    def _run_ocr_once(self, image_path: str, profile: str):
+    def _run_ocr_once(self, img, profile: str, recover: bool = True):
+        """
+        One pass on the shared engine. With `recover` a failure rebuilds the engine once; passes
+        running concurrently use recover=False and just raise, so they never swap the engine
+        under each other.
+        """
+        # `img` may be a file path, a decoded PIL image or an in-memory BGR ndarray.
         ocr = self._get_ocr(profile)
         backend_errors = []
         backend = "rapidocr"
@@ -386,19 +426,28 @@ class RapidOCRWorker:
         }
         if self._model_dir:
             param_summary["model_dir"] = self._model_dir
+        if self._model_paths:
+            param_summary["det"] = Path(self._model_paths["Det.model_path"]).name
+            param_summary["rec"] = Path(self._model_paths["Rec.model_path"]).name
 
         try:
-            with suppress_child_output(self._stderr_suppress):
-                out = ocr(image_path)
+            out = ocr(img)
             return out, backend, backend_errors, param_summary
         except Exception as e:
+            if not recover:
+                raise
             backend_errors.append(f"run_failed: {e}")
             # Recreate session once (covers partially downloaded/corrupted models).
             try:
-                self._ocr_by_profile.pop(profile, None)
+                with self._engine_lock:
+                    self._ocr = None
+                    if self._model_paths:
+                        # The INT8 models may be the culprit: fall back to the stock FP32 ones for good.
+                        self._model_paths = {}
+                        param_summary.pop("det", None)
+                        param_summary.pop("rec", None)
                 ocr = self._get_ocr(profile)
-                with suppress_child_output(self._stderr_suppress):
-                    out = ocr(image_path)
+                out = ocr(img)
                 backend_errors.append("recreated_session_ok")
                 return out, backend, backend_errors, param_summary
             except Exception as e2:
@@ -412,24 +461,22 @@ class RapidOCRWorker:
         if boxes is not None and hasattr(boxes, "tolist"):
             boxes = boxes.tolist()
 
-        lines = []
-        full_text_parts = []
-        for idx, text in enumerate(txts):
-            confidence = 0.0
-            if idx < len(scores) and scores[idx] is not None:
-                confidence = float(scores[idx])
-            line = {"text": text, "confidence": confidence}
-            if boxes is not None and idx < len(boxes):
-                line["box"] = boxes[idx]
-            lines.append(line)
+        n_scores = len(scores)
+        n_boxes = len(boxes) if boxes is not None else 0
+        lines = [
+            {
+                "text": text,
+                "confidence": float(scores[idx]) if idx < n_scores and scores[idx] is not None else 0.0,
+                **({"box": boxes[idx]} if idx < n_boxes else {}),
+            }
+            for idx, text in enumerate(txts)
+        ]
 
         ordered = reorder_lines_by_box(lines)
         ordered = apply_label_value_layout(ordered, profile)
-        for ln in ordered:
-            full_text_parts.append(ln.get("text") or "")
 
         return {
-            "text": "\n".join(full_text_parts),
+            "text": "\n".join([ln.get("text") or "" for ln in ordered]),
             "lines": ordered,
             "line_count": len(ordered),
             "score": score_lines(ordered),
@@ -449,10 +496,41 @@ class RapidOCRWorker:
         if profile not in ("default", "pdf"):
             profile = "default"
 
+        # Reprocessing the same bill (e.g. after a rescan) is answered from memory. Settings are
+        # fixed for the worker's lifetime, so the image bytes and the profile fully determine the result.
+        cache_key = None
+        if self._result_cache_size > 0 and not debug:
+            digest = image_digest(image_path)
+            if digest:
+                cache_key = (digest, profile)
+                cached = self._result_cache.get(cache_key)
+                if cached is not None:
+                    self._result_cache.move_to_end(cache_key)
+                    return copy_payload(cached)
+
         multipass = safe_int(os.getenv("SBM_RAPIDOCR_MULTIPASS"), 1 if profile == "pdf" else 0)
         rotate180 = truthy(os.getenv("SBM_RAPIDOCR_ROTATE180")) or (profile == "pdf")
 
-        out, backend, backend_errors, param_summary = self._run_ocr_once(image_path, profile)
+        # Latency budget: no further variant is started once SBM_OCR_BUDGET_MS is spent (0 = no limit).
+        budget_ms = safe_int(os.getenv("SBM_OCR_BUDGET_MS"), 0)
+        t_start = time.perf_counter()
+
+        def over_budget() -> bool:
+            return budget_ms > 0 and (time.perf_counter() - t_start) * 1000.0 > budget_ms
+
+        max_side_len = int(self._profile_overrides(profile).get("max_side_len") or 2000)
+
+        # Decode once: RapidOCR takes the PIL image as-is, and the variants are built from it too.
+        pil_img = load_pil_image(image_path) if multipass > 0 else None
+        src = pil_img if pil_img is not None else image_path
+        box_scale = 1.0
+        if pil_img is None and profile == "default" and truthy(os.getenv("SBM_OCR_FAST_DECODE")):
+            reduced, box_scale = load_reduced_bgr(image_path, max_side_len)
+            if reduced is not None:
+                src = reduced
+        out, backend, backend_errors, param_summary = self._run_ocr_once(src, profile)
+        if box_scale != 1.0 and getattr(out, "boxes", None) is not None:
+            out.boxes = out.boxes * box_scale
         best = self._build_result(out, profile, backend, backend_errors, param_summary)
         best_variant = "original"
         variants_debug = []
@@ -461,33 +539,63 @@ class RapidOCRWorker:
                 {"variant": best_variant, "score": best["score"], "lines": best["line_count"], "chars": len(best["text"])}
             )
 
-        pil_img = load_pil_image(image_path) if multipass > 0 else None
-        variants = build_variants(pil_img, profile, multipass, rotate180)
-        if variants:
-            with tempfile.TemporaryDirectory(prefix="sbm-ocr-") as td:
-                for name, im in variants:
-                    out_path = str(Path(td) / f"{name}.png")
-                    try:
-                        im.save(out_path, format="PNG", optimize=True)
-                    except Exception:
-                        continue
-
-                    out, backend, backend_errors, param_summary = self._run_ocr_once(out_path, profile)
-                    r = self._build_result(out, profile, backend, backend_errors, param_summary)
-                    if debug:
-                        variants_debug.append(
-                            {
-                                "variant": name,
-                                "score": r["score"],
-                                "lines": r["line_count"],
-                                "chars": len(r["text"]),
-                                "backend": r.get("backend", ""),
-                                "backend_errors": r.get("backend_errors", []),
-                            }
-                        )
-                    if r["score"] > best["score"]:
-                        best = r
-                        best_variant = name
+        # A confident original pass (typical for clean PDF pages) makes the variants pointless.
+        if multipass > 0 and (skip_remaining_variants(best) or over_budget()):
+            multipass = 0
+
+        variants = build_variants(pil_img if multipass > 0 else None, profile, multipass, rotate180, max_side_len)
+
+        def run_variant(arr):
+            out, backend, backend_errors, param_summary = self._run_ocr_once(arr, profile)
+            return self._build_result(out, profile, backend, backend_errors, param_summary)
+
+        # Variants go to the engine as in-memory BGR ndarrays (no temp image files). They are
+        # independent, so they run concurrently when there are spare cores (onnxruntime releases
+        # the GIL). As in ocr_cli.py they reuse the loaded engine: concurrent runs on one session
+        # share its intra-op pool, so the CPU is not oversubscribed. By default only a single worker
+        # process uses this; several workers (SBM_OCR_WORKERS) already keep the cores busy.
+        default_pool = (os.cpu_count() or 1) if safe_int(os.getenv("SBM_OCR_WORKERS"), 1) <= 1 else 1
+        pool_size = min(len(variants), safe_int(os.getenv("SBM_OCR_VARIANT_WORKERS"), default_pool))
+        if pool_size > 1:
+
+            def run_variant_concurrently(arr):
+                # A failing variant is dropped; the original pass already produced a result.
+                try:
+                    out, backend, backend_errors, param_summary = self._run_ocr_once(arr, profile, recover=False)
+                except Exception:
+                    return None
+                return self._build_result(out, profile, backend, backend_errors, param_summary)
+
+            # Budget and early exit are checked before each further variant starts, as on the serial path.
+            results = run_passes_concurrently(
+                run_variant_concurrently,
+                [arr for _, arr in variants],
+                pool_size,
+                lambda done: over_budget() or any(r is not None and skip_remaining_variants(r) for r in done),
+            )
+        else:
+            # Serial: lazily, so early exit / budget can stop before the next variant starts.
+            results = (run_variant(arr) for _, arr in variants)
+
+        for (name, _), r in zip(variants, results):
+            if r is None:
+                continue
+            if debug:
+                variants_debug.append(
+                    {
+                        "variant": name,
+                        "score": r["score"],
+                        "lines": r["line_count"],
+                        "chars": len(r["text"]),
+                        "backend": r.get("backend", ""),
+                        "backend_errors": r.get("backend_errors", []),
+                    }
+                )
+            if r["score"] > best["score"]:
+                best = r
+                best_variant = name
+            if pool_size <= 1 and (skip_remaining_variants(best) or over_budget()):
+                break
 
         payload = {
             "success": True,
@@ -503,27 +611,41 @@ class RapidOCRWorker:
         }
         if debug:
             payload["variants"] = variants_debug
+        # Degraded results (an engine rebuild or fallback happened) are not cached, so the next
+        # request for the same image gets a fresh run.
+        if cache_key is not None and not payload.get("backend_errors"):
+            self._result_cache[cache_key] = copy_payload(payload)
+            while len(self._result_cache) > self._result_cache_size:
+                self._result_cache.popitem(last=False)
         return payload
 
 
+def encode_line(obj: dict) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            # e.g. non-str dict keys, which the stdlib encoder still accepts
+            pass
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
 def write_line(obj: dict):
-    sys.stdout.write(json.dumps(obj, ensure_ascii=False) + "\n")
-    sys.stdout.flush()
+    _protocol_out.write(encode_line(obj))
+    _protocol_out.flush()
 
 
 def main():
+    redirect_child_output(truthy(os.getenv("SBM_OCR_WORKER_DEBUG")))
     worker = RapidOCRWorker()
-    while True:
-        line = sys.stdin.readline()
-        if not line:
-            return
-        line = line.strip()
-        if not line:
+    loads = orjson.loads if orjson is not None else json.loads
+    for line in iter(sys.stdin.buffer.readline, b""):
+        if line.isspace():
             continue
 
         req_id = ""
         try:
-            req = json.loads(line)
+            req = loads(line)
             req_id = str(req.get("id") or "")
             req_type = str(req.get("type") or "ocr").strip().lower()
 
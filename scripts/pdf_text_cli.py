@@ -4,39 +4,573 @@ PDF Text Extract CLI (PyMuPDF)
 
 Usage:
   python pdf_text_cli.py <pdf_path> [--layout zones|ordered|raw]
+  python pdf_text_cli.py --serve    (JSON-lines requests on stdin, see serve())
 
 Outputs strict JSON only (required by Go backend parsing).
 """
 
 from __future__ import annotations
 
-import contextlib
+import functools
 import json
 import os
 import sys
 from importlib import metadata
 
 
-@contextlib.contextmanager
-def suppress_child_output():
-    devnull = open(os.devnull, "w")
-    old_stdout_fd = os.dup(1)
-    old_stderr_fd = os.dup(2)
+# Below this many pages per worker process, forking costs more than it saves.
+PAGES_PER_WORKER = 4
+
+# Below this many spans/blocks the plain Python zoning passes are faster than building arrays;
+# typical invoice pages stay under it and never import NumPy.
+VECTORIZE_MIN_ITEMS = 400
+
+
+@functools.lru_cache(maxsize=1)
+def load_fitz():
+    """
+    Import PyMuPDF with its console output switched off, so stdout stays strict JSON without
+    redirecting file descriptors: MuPDF errors/warnings are not displayed and PyMuPDF's own
+    messages go to /dev/null. `import pymupdf` avoids the deprecation notice `import fitz`
+    prints on newer releases; older releases only ship the `fitz` name.
+    """
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz
+
+    try:
+        fitz.TOOLS.mupdf_display_errors(False)
+        fitz.TOOLS.mupdf_display_warnings(False)
+    except AttributeError:
+        pass
+    try:
+        fitz.set_messages(path=os.devnull)
+    except AttributeError:
+        pass
+    return fitz
+
+
+@functools.lru_cache(maxsize=1)
+def load_numpy():
+    """NumPy for the vectorised zoning passes, imported on first use; None when it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def safe_int(v: str | None, default: int) -> int:
+    try:
+        return int(str(v).strip())
+    except Exception:
+        return default
+
+
+@functools.lru_cache(maxsize=1)
+def pymupdf_version() -> str:
+    # Package metadata lookups walk site-packages; resolve once per process.
+    for name in ("pymupdf", "PyMuPDF"):
+        try:
+            return metadata.version(name)
+        except metadata.PackageNotFoundError:
+            continue
+    return "unknown"
+
+
+def page_text_blocks(page_dict):
+    """(bbox, line texts) for every text block, in PyMuPDF's block order."""
+    out = []
+    for b in page_dict.get("blocks", []) or []:
+        if not isinstance(b, dict) or b.get("type", 0) != 0:
+            continue
+        lines = [
+            "".join(str(s.get("text", "") or "") for s in ln.get("spans", []) or [] if isinstance(s, dict))
+            for ln in b.get("lines", []) or []
+            if isinstance(ln, dict)
+        ]
+        out.append((b.get("bbox"), lines))
+    return out
+
+
+def iter_page_spans(page_dict):
+    """
+    Non-empty text spans of a page as parallel columns (x0, y0, x1, y1, h, texts), so the zoning
+    passes index lists instead of chasing one dict per span.
+    """
+    x0s, y0s, x1s, y1s, texts = [], [], [], [], []
+    for b in page_dict.get("blocks", []) or []:
+        if not isinstance(b, dict):
+            continue
+        for ln in b.get("lines", []) or []:
+            if not isinstance(ln, dict):
+                continue
+            bbox = ln.get("bbox")
+            if not bbox or len(bbox) < 4:
+                continue
+            for s in ln.get("spans", []) or []:
+                if not isinstance(s, dict):
+                    continue
+                sb = s.get("bbox")
+                if not sb or len(sb) < 4:
+                    continue
+                txt = str(s.get("text", "") or "").replace("\r", "\n").strip()
+                if not txt:
+                    continue
+                x0s.append(float(sb[0]))
+                y0s.append(float(sb[1]))
+                x1s.append(float(sb[2]))
+                y1s.append(float(sb[3]))
+                texts.append(txt)
+
+    return as_columns(x0s, y0s, x1s, y1s, texts)
+
+
+def block_columns(blocks):
+    """Text blocks from `page_text_blocks` as the same columns as `iter_page_spans`."""
+    x0s, y0s, x1s, y1s, texts = [], [], [], [], []
+    for bbox, lines in blocks:
+        if not bbox or len(bbox) < 4:
+            continue
+        try:
+            txt = "\n".join(lines).replace("\r", "\n").strip()
+        except Exception:
+            txt = ""
+        if not txt:
+            continue
+        x0s.append(float(bbox[0]))
+        y0s.append(float(bbox[1]))
+        x1s.append(float(bbox[2]))
+        y1s.append(float(bbox[3]))
+        texts.append(txt)
+    return as_columns(x0s, y0s, x1s, y1s, texts)
+
+
+def as_columns(x0s, y0s, x1s, y1s, texts):
+    hs = [max(y1 - y0, 1.0) for y0, y1 in zip(y0s, y1s)]
+    return x0s, y0s, x1s, y1s, hs, texts
+
+
+def cluster_rows(idx, x0, y0, y1, hs):
+    """
+    Group the items `idx` (indices into the x0/y0/y1/hs columns) into rows: sorted by (y0, x0),
+    a new row starts when an item's top is below the row's lowest bottom by more than a
+    tolerance derived from the median item height. Returns lists of indices.
+
+    Large inputs (VECTORIZE_MIN_ITEMS or more) are clustered with NumPy; the result is the same.
+    """
+    if len(idx) == 0:
+        return []
+
+    np = load_numpy() if len(idx) >= VECTORIZE_MIN_ITEMS else None
+    if np is not None:
+        idx = np.asarray(idx, dtype=np.int64)
+        bx0, by0, by1 = (np.asarray(col, dtype=np.float64)[idx] for col in (x0, y0, y1))
+        # With y1 >= y0 a row's running bottom equals the running bottom over all previous items,
+        # so the row breaks fall out of one cumulative max.
+        if bool((by1 >= by0).all()):
+            row_tol = max(6.0, float(np.median(np.asarray(hs, dtype=np.float64)[idx])) * 0.7)
+            order = np.lexsort((bx0, by0))  # stable, like list.sort on (y0, x0)
+            bottom = np.maximum.accumulate(by1[order])
+            starts = np.flatnonzero(by0[order][1:] > bottom[:-1] + row_tol) + 1
+            return [row.tolist() for row in np.split(idx[order], starts)]
+        idx = idx.tolist()
+
+    items = sorted(idx, key=lambda i: (y0[i], x0[i]))
+    heights = sorted(hs[i] for i in items)
+    mid = len(heights) // 2
+    median_h = heights[mid] if len(heights) % 2 else (heights[mid - 1] + heights[mid]) / 2.0
+    row_tol = max(6.0, median_h * 0.7)
+
+    rows = []
+    current = []
+    current_max_y = None
+    for i in items:
+        if current and current_max_y is not None and y0[i] > current_max_y + row_tol:
+            rows.append(current)
+            current = [i]
+            current_max_y = y1[i]
+        else:
+            current.append(i)
+            current_max_y = y1[i] if current_max_y is None else max(current_max_y, y1[i])
+    if current:
+        rows.append(current)
+    return rows
+
+
+def region_for(cx, cy):
+    # Heuristic zones for A4 Chinese VAT invoices.
+    if cy < 0.22:
+        return "header_right" if cx >= 0.55 else "header_left"
+    # Password area is a right-side block that extends longer than buyer info.
+    if cx >= 0.58 and cy < 0.56:
+        return "password"
+    # Buyer block (left) is usually above the items table.
+    if cy < 0.40:
+        return "buyer"
+    # Items table occupies the middle section.
+    if cy < 0.72:
+        return "items"
+    if cy < 0.93:
+        return "seller" if cx < 0.58 else "remarks"
+    return "footer"
+
+
+# region_masks() order; the cascade mirrors region_for().
+REGION_NAMES = ("header_right", "header_left", "password", "buyer", "items", "seller", "remarks", "footer")
+
+
+def region_masks(cx, cy):
+    """Vectorised region_for(): one boolean mask per REGION_NAMES entry over the cx/cy arrays."""
+    header = cy < 0.22
+    rest = ~header
+    password = rest & (cx >= 0.58) & (cy < 0.56)
+    rest &= ~password
+    buyer = rest & (cy < 0.40)
+    rest &= ~buyer
+    items = rest & (cy < 0.72)
+    rest &= ~items
+    lower = rest & (cy < 0.93)
+    return (
+        header & (cx >= 0.55),
+        header & (cx < 0.55),
+        password,
+        buyer,
+        items,
+        lower & (cx < 0.58),
+        lower & (cx >= 0.58),
+        rest & ~lower,
+    )
+
+
+def build_zoned_text(page, page_dict, page_no: int, include_zones: bool):
+    w = float(page.rect.width or 1.0)
+    h = float(page.rect.height or 1.0)
+    x0, y0, x1, y1, hs, texts = iter_page_spans(page_dict)
+    if not texts:
+        return "", None
+
+    buckets = {
+        "header_left": [],
+        "header_right": [],
+        "buyer": [],
+        "password": [],
+        "items": [],
+        "seller": [],
+        "remarks": [],
+        "footer": [],
+    }
+    np = load_numpy() if len(texts) >= VECTORIZE_MIN_ITEMS else None
+    if np is not None:
+        ax0, ay0, ax1, ay1 = (np.asarray(col, dtype=np.float64) for col in (x0, y0, x1, y1))
+        cx = ((ax0 + ax1) / 2.0) / w
+        cy = ((ay0 + ay1) / 2.0) / h
+        for region, mask in zip(REGION_NAMES, region_masks(cx, cy)):
+            buckets[region] = np.flatnonzero(mask).tolist()
+    else:
+        for i in range(len(texts)):
+            cx = ((x0[i] + x1[i]) / 2.0) / w
+            cy = ((y0[i] + y1[i]) / 2.0) / h
+            buckets[region_for(cx, cy)].append(i)
+
+    # Rows per region, each sorted left to right; shared by the text and the zones payload.
+    rows_by_region = {}
+    for region, idx in buckets.items():
+        rows = []
+        for row in cluster_rows(idx, x0, y0, y1, hs):
+            row.sort(key=lambda i: x0[i])
+            row = [(i, t) for i in row if (t := texts[i].replace("\n", " ").strip())]
+            if row:
+                rows.append(row)
+        rows_by_region[region] = rows
+
+    def rows_to_lines(region):
+        return [" ".join(t for _, t in row) for row in rows_by_region[region]]
+
+    def rows_payload(region):
+        out = []
+        for row in rows_by_region[region]:
+            out.append(
+                {
+                    "region": region,
+                    "y0": min(float(y0[i]) for i, _ in row),
+                    "y1": max(float(y1[i]) for i, _ in row),
+                    "text": " ".join(t for _, t in row),
+                    "spans": [
+                        {
+                            "x0": float(x0[i]),
+                            "y0": float(y0[i]),
+                            "x1": float(x1[i]),
+                            "y1": float(y1[i]),
+                            "t": t,
+                        }
+                        for i, t in row
+                    ],
+                }
+            )
+        return out
+
+    hdr = rows_to_lines("header_right") + rows_to_lines("header_left")
+    buyer = rows_to_lines("buyer")
+    pwd = rows_to_lines("password")
+    items = rows_to_lines("items")
+    seller = rows_to_lines("seller")
+    other = rows_to_lines("remarks") + rows_to_lines("footer")
+
+    sections = [
+        ("发票信息", hdr),
+        ("购买方", buyer),
+        ("密码区", pwd),
+        ("明细", items),
+        ("销售方", seller),
+        ("备注/其他", other),
+    ]
+
+    out = [f"【第{page_no}页-分区】"]
+    for title, lines2 in sections:
+        if not lines2:
+            continue
+        out.append(f"【{title}】")
+        out.extend(lines2)
+        out.append("")
+    zone_payload = None
+    if include_zones:
+        rows = []
+        for region in buckets:
+            rows.extend(rows_payload(region))
+        zone_payload = {
+            "page": int(page_no),
+            "width": float(w),
+            "height": float(h),
+            "rows": rows,
+        }
+    return "\n".join(out).rstrip(), zone_payload
+
+
+def extract_page(page, page_no: int, layout_mode: str, include_zones: bool):
+    """
+    Text of one page in every layout: (raw text, zoned text, zones payload or None, ordered lines).
+    Only plain data is returned, so pages can be extracted in worker processes.
+    """
+    fitz = load_fitz()
+
+    # Extract each page once: the plain text, the zone spans and the ordered blocks are all
+    # derived from this dict. The flags match "text"/"blocks" mode, so images are left out.
+    try:
+        page_dict = page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT) or {}
+    except Exception:
+        page_dict = {}
+    blocks = page_text_blocks(page_dict)
+    raw = "".join(f"{t}\n" for _, lines in blocks for t in lines)
+
+    zoned, zones_meta = "", None
+    if layout_mode == "zones":
+        try:
+            zoned, zones_meta = build_zoned_text(page, page_dict, page_no, include_zones)
+        except Exception:
+            zoned, zones_meta = "", None
+
+    # Blocks with position, clustered by rows (dynamic tolerance) then sorted by x.
+    ordered = []
+    try:
+        x0, y0, _, y1, hs, texts = block_columns(blocks)
+        for row in cluster_rows(range(len(texts)), x0, y0, y1, hs):
+            row.sort(key=lambda i: x0[i])
+            parts = [t for i in row if (t := texts[i].strip())]
+            if parts:
+                ordered.append(" ".join(parts))
+    except Exception:
+        # ignore this page ordering failure
+        ordered = []
+    return raw, zoned, zones_meta, ordered
+
+
+def extract_page_range(pdf_path: str, start: int, stop: int, layout_mode: str, include_zones: bool):
+    """extract_page() for pages [start, stop), opening the document in this (worker) process."""
+    fitz = load_fitz()
+
+    with fitz.open(pdf_path, filetype="pdf") as doc:
+        return [extract_page(doc[i], i + 1, layout_mode, include_zones) for i in range(start, stop)]
+
+
+def extract_pages(doc, pdf_path: str, layout_mode: str, include_zones: bool):
+    """
+    extract_page() for every page, in page order. MuPDF is not thread-safe, so long documents are
+    split into contiguous page ranges across worker processes (SBM_PDF_TEXT_WORKERS, default up to
+    4; 1 disables); short ones, like typical invoices, are not worth the process startup.
+    """
+    page_count = doc.page_count
+    workers = safe_int(os.getenv("SBM_PDF_TEXT_WORKERS"), min(4, os.cpu_count() or 1))
+    workers = min(workers, page_count // PAGES_PER_WORKER)
+    if workers > 1:
+        try:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            bounds = [page_count * k // workers for k in range(workers + 1)]
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as pool:
+                chunks = pool.map(
+                    extract_page_range,
+                    [pdf_path] * workers,
+                    bounds[:-1],
+                    bounds[1:],
+                    [layout_mode] * workers,
+                    [include_zones] * workers,
+                )
+                return [r for chunk in chunks for r in chunk]
+        except Exception:
+            # e.g. no fork on this platform: fall back to the serial loop
+            pass
+    return [extract_page(page, i + 1, layout_mode, include_zones) for i, page in enumerate(doc)]
+
+
+def normalize_options(layout=None, include_zones=None, zones_pages=None):
+    """(layout_mode, include_zones, max_zones_pages) from raw CLI/request values; None means unset."""
+    layout_mode = str(layout or "zones").strip().lower()
+    if layout_mode not in ("zones", "ordered", "raw"):
+        layout_mode = "zones"
+
+    include = True
+    if include_zones is not None:
+        include = str(include_zones).strip().lower() not in ("0", "false", "no", "off")
+
+    # Default: include first page zones only to keep payload small.
+    max_zones_pages = 1
+    if zones_pages is not None:
+        try:
+            max_zones_pages = int(zones_pages)
+        except Exception:
+            max_zones_pages = 1
+    if max_zones_pages < 0:
+        max_zones_pages = 0
+    return layout_mode, include, max_zones_pages
+
+
+def extract_pdf_text(pdf_path: str, layout_mode: str, include_zones: bool, max_zones_pages: int) -> dict:
+    fitz = load_fitz()
+
+    raw_parts = []
+    ordered_parts = []
+    zoned_parts = []
+    zoned_pages = []
+    page_count = 0
+
+    # The backend only sends PDFs: naming the type skips MuPDF's format sniffing on open.
+    with fitz.open(pdf_path, filetype="pdf") as doc:
+        for page_no, (raw, zoned, zones_meta, ordered) in enumerate(
+            extract_pages(doc, pdf_path, layout_mode, include_zones), start=1
+        ):
+            page_count = page_no
+            raw_parts.append(raw)
+            if zoned:
+                zoned_parts.append(zoned)
+            if include_zones and zones_meta and max_zones_pages > 0 and len(zoned_pages) < max_zones_pages:
+                zoned_pages.append(zones_meta)
+            ordered_parts.extend(ordered)
+
+    raw_text = "\n".join(t for t in raw_parts if t)
+    ordered_text = "\n".join(ordered_parts)
+    zoned_text = "\n\n".join(zoned_parts).strip()
+
+    layout_used = "raw"
+    final_text = raw_text
+    if layout_mode == "zones" and zoned_text:
+        layout_used = "zones"
+        final_text = zoned_text
+    elif layout_mode in ("zones", "ordered") and ordered_text:
+        layout_used = "ordered"
+        final_text = ordered_text
+    elif raw_text:
+        layout_used = "raw"
+        final_text = raw_text
+
+    # Cheap signal for callers deciding whether OCR is still needed: characters of embedded text
+    # per page, and whether that text layer looks like a (Chinese) document at all.
+    text_density = sum(len(t) for t in raw_parts) / page_count if page_count else 0.0
+    has_text_layer = text_density > 50 and any("\u4e00" <= ch <= "\u9fff" for ch in raw_text)
+
+    return {
+        "success": True,
+        "text": final_text,
+        "raw_text": raw_text,
+        "zoned_text": zoned_text,
+        "zones": zoned_pages if include_zones and zoned_pages else None,
+        "layout": layout_used,
+        "ordered": bool(ordered_text),
+        "page_count": page_count,
+        "has_text_layer": has_text_layer,
+        "text_density": round(text_density, 1),
+        "extractor": f"pymupdf-{pymupdf_version()}",
+    }
+
+
+def dumps_json(obj) -> str:
+    """
+    Serialize the payload. Uses orjson when it is installed (much faster on multi-page zoned
+    text) and falls back to the stdlib; both emit UTF-8 text, not \\u escapes.
+    """
     try:
-        os.dup2(devnull.fileno(), 1)
-        os.dup2(devnull.fileno(), 2)
-        yield
+        import orjson
+
+        return orjson.dumps(obj).decode("utf-8")
+    except Exception:
+        return json.dumps(obj, ensure_ascii=False)
+
+
+def redirect_child_output():
+    """
+    For --serve: move the JSON-lines protocol to a private dup of stdout and point fds 1 and 2 at
+    /dev/null for the whole process, so MuPDF messages can never interleave with responses.
+    """
+    sys.stdout.flush()
+    out_fd = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    try:
+        os.dup2(devnull, 1)
+        os.dup2(devnull, 2)
     finally:
+        os.close(devnull)
+    return os.fdopen(out_fd, "wb")
+
+
+def serve():
+    """
+    Long-running mode (--serve): one JSON request per stdin line, e.g.
+    {"id": "...", "pdf_path": "...", "layout": "zones", "include_zones": "true", "zones_pages": 1},
+    answered on one stdout line with the one-shot payload plus "id". Python and PyMuPDF load once.
+    """
+    out = redirect_child_output()
+    for line in iter(sys.stdin.buffer.readline, b""):
+        if line.isspace():
+            continue
+
+        req_id = ""
         try:
-            os.dup2(old_stdout_fd, 1)
-            os.dup2(old_stderr_fd, 2)
-        finally:
-            os.close(old_stdout_fd)
-            os.close(old_stderr_fd)
-            devnull.close()
+            req = json.loads(line)
+            req_id = str(req.get("id") or "")
+            pdf_path = str(req.get("pdf_path") or "")
+            if str(req.get("type") or "").strip().lower() == "ping":
+                resp = {"success": True}
+            elif not pdf_path or not os.path.exists(pdf_path):
+                resp = {"success": False, "error": f"PDF file not found: {pdf_path}"}
+            else:
+                opts = normalize_options(req.get("layout"), req.get("include_zones"), req.get("zones_pages"))
+                resp = extract_pdf_text(pdf_path, *opts)
+        except ImportError:
+            resp = {"success": False, "error": "PyMuPDF not available. Install pymupdf."}
+        except Exception as e:
+            resp = {"success": False, "error": str(e)}
+        resp["id"] = req_id
+        out.write((dumps_json(resp) + "\n").encode("utf-8"))
+        out.flush()
 
 
 def main():
+    if "--serve" in sys.argv[1:]:
+        serve()
+        return
+
     if len(sys.argv) < 2 or not sys.argv[1]:
         print(json.dumps({"success": False, "error": "No PDF path provided"}))
         sys.exit(1)
@@ -46,360 +580,16 @@ def main():
         print(json.dumps({"success": False, "error": f"PDF file not found: {pdf_path}"}))
         sys.exit(1)
 
-    try:
-        with suppress_child_output():
-            import fitz  # PyMuPDF
-
-            pymupdf_version = "unknown"
-            try:
-                pymupdf_version = metadata.version("pymupdf")
-            except metadata.PackageNotFoundError:
-                try:
-                    pymupdf_version = metadata.version("PyMuPDF")
-                except metadata.PackageNotFoundError:
-                    pass
-
-            doc = fitz.open(pdf_path)
-            raw_parts = []
-            ordered_parts = []
-            zoned_parts = []
-            zoned_pages = []
-            page_count = 0
-
-            layout_mode = "zones"
-            if "--layout" in sys.argv:
-                try:
-                    layout_mode = sys.argv[sys.argv.index("--layout") + 1].strip().lower()
-                except Exception:
-                    layout_mode = "zones"
-            if layout_mode not in ("zones", "ordered", "raw"):
-                layout_mode = "zones"
-
-            include_zones = True
-            if "--include-zones" in sys.argv:
-                try:
-                    v = sys.argv[sys.argv.index("--include-zones") + 1].strip().lower()
-                    include_zones = v not in ("0", "false", "no", "off")
-                except Exception:
-                    include_zones = True
-            # Default: include first page zones only to keep payload small.
-            max_zones_pages = 1
-            if "--zones-pages" in sys.argv:
-                try:
-                    max_zones_pages = int(sys.argv[sys.argv.index("--zones-pages") + 1])
-                except Exception:
-                    max_zones_pages = 1
-            if max_zones_pages < 0:
-                max_zones_pages = 0
-
-            def iter_page_spans(page):
-                try:
-                    d = page.get_text("dict") or {}
-                except Exception:
-                    return []
-                out = []
-                for b in d.get("blocks", []) or []:
-                    if not isinstance(b, dict):
-                        continue
-                    for ln in b.get("lines", []) or []:
-                        if not isinstance(ln, dict):
-                            continue
-                        bbox = ln.get("bbox")
-                        if not bbox or len(bbox) < 4:
-                            continue
-                        for s in ln.get("spans", []) or []:
-                            if not isinstance(s, dict):
-                                continue
-                            sb = s.get("bbox")
-                            if not sb or len(sb) < 4:
-                                continue
-                            txt = str(s.get("text", "") or "").replace("\r", "\n").strip()
-                            if not txt:
-                                continue
-                            x0, y0, x1, y1 = sb[0], sb[1], sb[2], sb[3]
-                            try:
-                                h = float(y1) - float(y0)
-                            except Exception:
-                                h = 0.0
-                            out.append(
-                                {
-                                    "x0": float(x0),
-                                    "y0": float(y0),
-                                    "x1": float(x1),
-                                    "y1": float(y1),
-                                    "h": max(h, 1.0),
-                                    "t": txt,
-                                }
-                            )
-                return out
-
-            def cluster_rows(items):
-                if not items:
-                    return []
-                items.sort(key=lambda it: (it["y0"], it["x0"]))
-                hs = sorted([it["h"] for it in items])
-                mid = len(hs) // 2
-                median_h = hs[mid] if len(hs) % 2 else (hs[mid - 1] + hs[mid]) / 2.0
-                row_tol = max(6.0, median_h * 0.7)
-
-                rows = []
-                current = []
-                current_max_y = None
-                for it in items:
-                    if current and current_max_y is not None and it["y0"] > current_max_y + row_tol:
-                        rows.append(current)
-                        current = [it]
-                        current_max_y = it["y1"]
-                    else:
-                        current.append(it)
-                        current_max_y = it["y1"] if current_max_y is None else max(current_max_y, it["y1"])
-                if current:
-                    rows.append(current)
-                return rows
-
-            def region_for(cx, cy):
-                # Heuristic zones for A4 Chinese VAT invoices.
-                if cy < 0.22:
-                    return "header_right" if cx >= 0.55 else "header_left"
-                # Password area is a right-side block that extends longer than buyer info.
-                if cx >= 0.58 and cy < 0.56:
-                    return "password"
-                # Buyer block (left) is usually above the items table.
-                if cy < 0.40:
-                    return "buyer"
-                # Items table occupies the middle section.
-                if cy < 0.72:
-                    return "items"
-                if cy < 0.93:
-                    return "seller" if cx < 0.58 else "remarks"
-                return "footer"
-
-            def build_zoned_text(page, page_no):
-                w = float(page.rect.width or 1.0)
-                h = float(page.rect.height or 1.0)
-                spans = iter_page_spans(page)
-                if not spans:
-                    return "", None
-
-                buckets = {
-                    "header_left": [],
-                    "header_right": [],
-                    "buyer": [],
-                    "password": [],
-                    "items": [],
-                    "seller": [],
-                    "remarks": [],
-                    "footer": [],
-                }
-                for it in spans:
-                    cx = ((it["x0"] + it["x1"]) / 2.0) / w
-                    cy = ((it["y0"] + it["y1"]) / 2.0) / h
-                    buckets[region_for(cx, cy)].append(it)
-
-                def rows_to_lines(items):
-                    out = []
-                    for row in cluster_rows(items):
-                        row.sort(key=lambda it: it["x0"])
-                        parts = []
-                        for it in row:
-                            t = str(it["t"] or "").replace("\n", " ").strip()
-                            if t:
-                                parts.append(t)
-                        if parts:
-                            out.append(" ".join(parts))
-                    return out
-
-                def rows_payload(region, items):
-                    out = []
-                    for row in cluster_rows(items):
-                        row.sort(key=lambda it: it["x0"])
-                        spans2 = []
-                        parts = []
-                        y0s = []
-                        y1s = []
-                        for it in row:
-                            t = str(it["t"] or "").replace("\n", " ").strip()
-                            if not t:
-                                continue
-                            spans2.append(
-                                {
-                                    "x0": float(it["x0"]),
-                                    "y0": float(it["y0"]),
-                                    "x1": float(it["x1"]),
-                                    "y1": float(it["y1"]),
-                                    "t": t,
-                                }
-                            )
-                            parts.append(t)
-                            y0s.append(float(it["y0"]))
-                            y1s.append(float(it["y1"]))
-                        if spans2:
-                            out.append(
-                                {
-                                    "region": region,
-                                    "y0": min(y0s) if y0s else 0.0,
-                                    "y1": max(y1s) if y1s else 0.0,
-                                    "text": " ".join(parts),
-                                    "spans": spans2,
-                                }
-                            )
-                    return out
-
-                hdr = rows_to_lines(buckets["header_right"]) + rows_to_lines(buckets["header_left"])
-                buyer = rows_to_lines(buckets["buyer"])
-                pwd = rows_to_lines(buckets["password"])
-                items = rows_to_lines(buckets["items"])
-                seller = rows_to_lines(buckets["seller"])
-                other = rows_to_lines(buckets["remarks"]) + rows_to_lines(buckets["footer"])
-
-                sections = [
-                    ("发票信息", hdr),
-                    ("购买方", buyer),
-                    ("密码区", pwd),
-                    ("明细", items),
-                    ("销售方", seller),
-                    ("备注/其他", other),
-                ]
-
-                out = [f"【第{page_no}页-分区】"]
-                for title, lines2 in sections:
-                    if not lines2:
-                        continue
-                    out.append(f"【{title}】")
-                    out.extend(lines2)
-                    out.append("")
-                zone_payload = None
-                if include_zones:
-                    rows = []
-                    for region, items2 in buckets.items():
-                        rows.extend(rows_payload(region, items2))
-                    zone_payload = {
-                        "page": int(page_no),
-                        "width": float(w),
-                        "height": float(h),
-                        "rows": rows,
-                    }
-                return "\n".join(out).rstrip(), zone_payload
-
-            for page in doc:
-                page_count += 1
-                try:
-                    raw_parts.append(page.get_text("text") or "")
-                except Exception:
-                    raw_parts.append("")
-                try:
-                    if layout_mode == "zones":
-                        zoned, zones_meta = build_zoned_text(page, page_count)
-                        if zoned:
-                            zoned_parts.append(zoned)
-                        if (
-                            include_zones
-                            and zones_meta
-                            and max_zones_pages > 0
-                            and len(zoned_pages) < max_zones_pages
-                        ):
-                            zoned_pages.append(zones_meta)
-                except Exception:
-                    pass
-                # Blocks with position, clustered by rows (dynamic tolerance) then sorted by x.
-                try:
-                    blocks = page.get_text("blocks") or []
-                    items = []
-                    for b in blocks:
-                        if not isinstance(b, (list, tuple)) or len(b) < 5:
-                            continue
-                        x0, y0, x1, y1, txt = b[0], b[1], b[2], b[3], b[4]
-                        try:
-                            txt = str(txt or "").replace("\r", "\n").strip()
-                        except Exception:
-                            txt = ""
-                        if not txt:
-                            continue
-                        try:
-                            h = float(y1) - float(y0)
-                        except Exception:
-                            h = 0.0
-                        items.append(
-                            {
-                                "x0": float(x0),
-                                "y0": float(y0),
-                                "x1": float(x1),
-                                "y1": float(y1),
-                                "h": max(h, 1.0),
-                                "t": txt,
-                            }
-                        )
-
-                    if not items:
-                        continue
-
-                    items.sort(key=lambda it: (it["y0"], it["x0"]))
-                    hs = sorted([it["h"] for it in items])
-                    mid = len(hs) // 2
-                    median_h = hs[mid] if len(hs) % 2 else (hs[mid - 1] + hs[mid]) / 2.0
-                    row_tol = max(6.0, median_h * 0.7)
-
-                    rows = []
-                    current = []
-                    current_max_y = None
-                    for it in items:
-                        if current and current_max_y is not None and it["y0"] > current_max_y + row_tol:
-                            rows.append(current)
-                            current = [it]
-                            current_max_y = it["y1"]
-                        else:
-                            current.append(it)
-                            current_max_y = it["y1"] if current_max_y is None else max(current_max_y, it["y1"])
-                    if current:
-                        rows.append(current)
-
-                    for row in rows:
-                        row.sort(key=lambda it: it["x0"])
-                        parts = []
-                        for it in row:
-                            t = it["t"].strip()
-                            if t:
-                                parts.append(t)
-                        if parts:
-                            ordered_parts.append(" ".join(parts))
-                except Exception:
-                    # ignore this page ordering failure
-                    continue
-
-            doc.close()
-
-        raw_text = "\n".join(t for t in raw_parts if t)
-        ordered_text = "\n".join(ordered_parts)
-        zoned_text = "\n\n".join(zoned_parts).strip()
-
-        layout_used = "raw"
-        final_text = raw_text
-        if layout_mode == "zones" and zoned_text:
-            layout_used = "zones"
-            final_text = zoned_text
-        elif layout_mode in ("zones", "ordered") and ordered_text:
-            layout_used = "ordered"
-            final_text = ordered_text
-        elif raw_text:
-            layout_used = "raw"
-            final_text = raw_text
+    def arg_value(flag: str):
+        if flag not in sys.argv:
+            return None
+        i = sys.argv.index(flag) + 1
+        return sys.argv[i] if i < len(sys.argv) else None
 
-        print(
-            json.dumps(
-                {
-                    "success": True,
-                    "text": final_text,
-                    "raw_text": raw_text,
-                    "zoned_text": zoned_text,
-                    "zones": zoned_pages if include_zones and zoned_pages else None,
-                    "layout": layout_used,
-                    "ordered": bool(ordered_text),
-                    "page_count": page_count,
-                    "extractor": f"pymupdf-{pymupdf_version}",
-                },
-                ensure_ascii=False,
-            )
-        )
+    opts = normalize_options(arg_value("--layout"), arg_value("--include-zones"), arg_value("--zones-pages"))
+    try:
+        payload = extract_pdf_text(pdf_path, *opts)
+        print(dumps_json(payload))
         return
     except ImportError:
         print(
@@ -0,0 +1,177 @@
+import argparse
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import ocr_cli
+import ocr_worker
+
+
+def cli_args(**overrides):
+    args = {
+        "image_path": "",
+        "engine": None,
+        "profile": "pdf",
+        "max_side_len": None,
+        "min_height": None,
+        "text_score": None,
+        "debug": False,
+        "rec_only": False,
+    }
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    for key in list(os.environ):
+        if key.startswith("SBM_"):
+            monkeypatch.delenv(key)
+    monkeypatch.setenv("SBM_OCR_DATA_DIR", str(tmp_path / "data"))
+    return tmp_path
+
+
+def write_image(path, data: bytes):
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_cli_cache_key_hit_and_miss(data_dir, monkeypatch):
+    img_a = write_image(data_dir / "a.png", b"image-a")
+    img_b = write_image(data_dir / "b.png", b"image-b")
+
+    path = ocr_cli.ocr_cache_path(cli_args(), img_a)
+    assert path is not None and path.parent == data_dir / "data" / "ocr-cache"
+    assert ocr_cli.ocr_cache_path(cli_args(), img_a) == path
+    # Same bytes under another name share the entry.
+    assert ocr_cli.ocr_cache_path(cli_args(), write_image(data_dir / "copy.png", b"image-a")) == path
+
+    assert ocr_cli.ocr_cache_path(cli_args(), img_b) != path
+    assert ocr_cli.ocr_cache_path(cli_args(profile="default"), img_a) != path
+    monkeypatch.setenv("SBM_RAPIDOCR_MULTIPASS", "2")
+    assert ocr_cli.ocr_cache_path(cli_args(), img_a) != path
+
+    monkeypatch.setenv("SBM_OCR_CACHE_MB", "0")
+    assert ocr_cli.ocr_cache_path(cli_args(), img_a) is None
+
+
+def test_cli_cache_read_write(data_dir):
+    path = ocr_cli.ocr_cache_path(cli_args(), write_image(data_dir / "a.png", b"image-a"))
+    assert ocr_cli.read_ocr_cache(path) is None
+
+    data = json.dumps({"success": True, "text": "发票"}, ensure_ascii=False)
+    ocr_cli.write_ocr_cache(path, data)
+    assert ocr_cli.read_ocr_cache(path) == data
+    assert list(path.parent.glob("*.tmp")) == []
+
+    path.write_text("{truncated", encoding="utf-8")
+    assert ocr_cli.read_ocr_cache(path) is None
+    assert ocr_cli.read_ocr_cache(None) is None
+
+
+def test_cli_cache_evicts_least_recently_used(data_dir, monkeypatch):
+    monkeypatch.setenv("SBM_OCR_CACHE_MB", "1")
+    cache_dir = data_dir / "data" / "ocr-cache"
+    payload = json.dumps({"text": "x" * 300_000})
+
+    paths = [cache_dir / f"{i}.json" for i in range(4)]
+    for i, p in enumerate(paths[:3]):
+        ocr_cli.write_ocr_cache(p, payload)
+        os.utime(p, (1000 + i, 1000 + i))
+    # Reading the oldest entry refreshes it, so the next-oldest is evicted instead.
+    assert ocr_cli.read_ocr_cache(paths[0]) == payload
+
+    ocr_cli.write_ocr_cache(paths[3], payload)
+    assert sorted(p.name for p in cache_dir.glob("*.json")) == ["0.json", "2.json", "3.json"]
+
+
+class FakeEngineWorker:
+    """A RapidOCRWorker whose engine pass is replaced by a counter, to exercise the result cache."""
+
+    def __init__(self, monkeypatch, cache_size: int):
+        monkeypatch.setenv("SBM_OCR_WORKER_CACHE", str(cache_size))
+        monkeypatch.setenv("SBM_OCR_WORKER_WARMUP", "0")
+        self.worker = ocr_worker.RapidOCRWorker()
+        self.worker._ok = True
+        self.runs = 0
+        self.backend_errors = []
+        monkeypatch.setattr(self.worker, "_run_ocr_once", self._run_ocr_once)
+
+    def _run_ocr_once(self, img, profile, recover=True):
+        self.runs += 1
+        out = SimpleNamespace(
+            txts=("合计", "¥100.00"),
+            scores=(0.99, 0.98),
+            boxes=[[[0, 0], [40, 0], [40, 10], [0, 10]], [[50, 0], [90, 0], [90, 10], [50, 10]]],
+        )
+        return out, "rapidocr", list(self.backend_errors), {"rapidocr": "test"}
+
+    def recognize(self, path, profile="default"):
+        return self.worker.recognize(path, profile, False)
+
+
+def test_worker_cache_hit_miss_and_eviction(data_dir, monkeypatch):
+    fake = FakeEngineWorker(monkeypatch, cache_size=2)
+    a = write_image(data_dir / "a.png", b"image-a")
+    b = write_image(data_dir / "b.png", b"image-b")
+    c = write_image(data_dir / "c.png", b"image-c")
+
+    first = fake.recognize(a)
+    assert first["success"] and fake.runs == 1
+    assert fake.recognize(a) == first and fake.runs == 1
+    fake.recognize(a, profile="pdf")
+    assert fake.runs == 2
+
+    # Capacity 2: (a, default) was used least recently and is evicted.
+    fake.recognize(b)
+    assert fake.runs == 3
+    fake.recognize(a, profile="pdf")
+    assert fake.runs == 3
+    fake.recognize(a)
+    assert fake.runs == 4
+    fake.recognize(c)
+    assert fake.runs == 5
+    assert len(fake.worker._result_cache) == 2
+
+
+def test_worker_cache_returns_independent_copies(data_dir, monkeypatch):
+    fake = FakeEngineWorker(monkeypatch, cache_size=4)
+    a = write_image(data_dir / "a.png", b"image-a")
+
+    first = fake.recognize(a)
+    expected = json.loads(json.dumps(first))
+    first["lines"][0]["text"] = "changed"
+    first["lines"][0]["box"][0][0] = 999
+    first["params"]["rapidocr"] = "changed"
+    first["id"] = "req-1"
+
+    second = fake.recognize(a)
+    assert fake.runs == 1
+    assert second == expected
+    second["lines"].clear()
+    assert fake.recognize(a) == expected
+
+
+def test_worker_cache_skips_degraded_results(data_dir, monkeypatch):
+    fake = FakeEngineWorker(monkeypatch, cache_size=4)
+    a = write_image(data_dir / "a.png", b"image-a")
+
+    fake.backend_errors = ["run_failed: boom", "recreated_session_ok"]
+    assert fake.recognize(a)["backend_errors"]
+    fake.recognize(a)
+    assert fake.runs == 2
+
+    fake.backend_errors = []
+    fake.recognize(a)
+    fake.recognize(a)
+    assert fake.runs == 3
+
+
+def test_worker_cache_disabled(data_dir, monkeypatch):
+    fake = FakeEngineWorker(monkeypatch, cache_size=0)
+    a = write_image(data_dir / "a.png", b"image-a")
+    fake.recognize(a)
+    fake.recognize(a)
+    assert fake.runs == 2
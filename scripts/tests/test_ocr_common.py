@@ -0,0 +1,117 @@
+import random
+import time
+
+import pytest
+
+import ocr_common
+
+
+def reference_reorder(lines):
+    """Row clustering of the original ocr_cli.reorder_lines_by_box, kept as the expected order."""
+    processed = []
+    for line in lines:
+        box = line.get("box") or []
+        if not box:
+            continue
+        xs = [p[0] for p in box if isinstance(p, (list, tuple)) and len(p) >= 2]
+        ys = [p[1] for p in box if isinstance(p, (list, tuple)) and len(p) >= 2]
+        if not xs or not ys:
+            continue
+        miny, maxy = min(ys), max(ys)
+        processed.append({"line": line, "minx": min(xs), "miny": miny, "maxy": maxy, "height": max(1.0, maxy - miny)})
+    if not processed:
+        return lines
+
+    heights = sorted(p["height"] for p in processed)
+    mid = len(heights) // 2
+    median_h = heights[mid] if len(heights) % 2 else (heights[mid - 1] + heights[mid]) / 2
+    row_tol = max(5.0, median_h * 0.6)
+
+    processed.sort(key=lambda p: (p["miny"], p["minx"]))
+    rows, current, current_maxy = [], [], None
+    for p in processed:
+        if current and current_maxy is not None and p["miny"] > current_maxy + row_tol:
+            rows.append(current)
+            current, current_maxy = [p], p["maxy"]
+        else:
+            current.append(p)
+            current_maxy = p["maxy"] if current_maxy is None else max(current_maxy, p["maxy"])
+    if current:
+        rows.append(current)
+
+    ordered = []
+    for row in rows:
+        row.sort(key=lambda p: p["minx"])
+        ordered.extend(row)
+    return [p["line"] for p in ordered]
+
+
+def quad(x, y, w, h):
+    return [[x, y], [x + w, y], [x + w, y + h], [x, y + h]]
+
+
+def random_lines(n, seed, single_row=False):
+    rng = random.Random(seed)
+    lines = []
+    for i in range(n):
+        x = rng.choice([10.0, 120.0, 260.0, 400.0]) + rng.uniform(0, 4)
+        y = (0.0 if single_row else rng.randrange(0, 30) * 24.0) + rng.uniform(-4, 4)
+        h = rng.uniform(30, 50) if i % 17 == 0 else rng.uniform(14, 20)
+        lines.append({"text": f"l{i}", "box": quad(x, y, rng.uniform(20, 90), h)})
+    return lines
+
+
+@pytest.mark.parametrize("n,seed", [(1, 0), (2, 1), (12, 2), (80, 3), (400, 4)])
+def test_reorder_lines_by_box_matches_reference(n, seed):
+    pytest.importorskip("numpy")
+    lines = random_lines(n, seed)
+    assert ocr_common.reorder_lines_by_box(lines) == reference_reorder(lines)
+
+
+def test_reorder_single_row_matches_reference():
+    pytest.importorskip("numpy")
+    lines = random_lines(25, 5, single_row=True)
+    assert ocr_common.reorder_lines_by_box(lines) == reference_reorder(lines)
+
+
+def test_reorder_skips_lines_without_boxes():
+    pytest.importorskip("numpy")
+    lines = random_lines(20, 6)
+    lines[3]["box"] = None
+    lines[7]["box"] = []
+    lines[11]["box"] = [["bad"]]
+    assert ocr_common.reorder_lines_by_box(lines) == reference_reorder(lines)
+    no_boxes = [{"text": "a"}, {"text": "b"}]
+    assert ocr_common.reorder_lines_by_box(no_boxes) is no_boxes
+
+
+def test_box_reading_order_on_detector_array():
+    np = pytest.importorskip("numpy")
+    lines = random_lines(60, 7)
+    boxes = np.asarray([ln["box"] for ln in lines], dtype=np.float32)
+    expected = [int(ln["text"][1:]) for ln in reference_reorder(lines)]
+    assert ocr_common.box_reading_order(boxes).tolist() == expected
+
+
+def test_run_passes_concurrently_keeps_input_order():
+    def run(x):
+        time.sleep(0.01 * (3 - x % 3))
+        return x * 10
+
+    assert ocr_common.run_passes_concurrently(run, range(7), 3, lambda done: False) == [x * 10 for x in range(7)]
+
+
+def test_run_passes_concurrently_stops_submitting():
+    started = []
+
+    def run(x):
+        started.append(x)
+        return x
+
+    # The first pass always runs; `stop` is checked before each further one.
+    assert ocr_common.run_passes_concurrently(run, range(5), 2, lambda done: True) == [0]
+    assert started == [0]
+
+    results = ocr_common.run_passes_concurrently(run, range(10), 2, lambda done: len(done) >= 3)
+    assert 3 <= len(results) <= 5
+    assert results == list(range(len(results)))
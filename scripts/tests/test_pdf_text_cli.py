@@ -0,0 +1,185 @@
+import random
+
+import pytest
+
+import pdf_text_cli
+
+
+def make_columns(n: int, seed: int = 1):
+    rng = random.Random(seed)
+    x0s, y0s, x1s, y1s, texts = [], [], [], [], []
+    for i in range(n):
+        x = (i % 7) * 80 + rng.uniform(0, 6)
+        y = (i // 7) * 14 + rng.uniform(-3, 3)
+        x0s.append(x)
+        y0s.append(y)
+        x1s.append(x + rng.uniform(10, 70))
+        # Some tall items span several rows.
+        y1s.append(y + (rng.uniform(30, 45) if i % 29 == 0 else rng.uniform(8, 12)))
+        texts.append(f"t{i}")
+    return pdf_text_cli.as_columns(x0s, y0s, x1s, y1s, texts)
+
+
+def cluster_both(monkeypatch, idx, x0, y0, y1, hs):
+    monkeypatch.setattr(pdf_text_cli, "VECTORIZE_MIN_ITEMS", 10**9)
+    plain = pdf_text_cli.cluster_rows(idx, x0, y0, y1, hs)
+    monkeypatch.setattr(pdf_text_cli, "VECTORIZE_MIN_ITEMS", 1)
+    vectorised = pdf_text_cli.cluster_rows(idx, x0, y0, y1, hs)
+    return plain, vectorised
+
+
+@pytest.mark.parametrize("n", [1, 2, 15, 120, 900])
+def test_cluster_rows_branches_match(monkeypatch, n):
+    pytest.importorskip("numpy")
+    x0, y0, _, y1, hs, _ = make_columns(n)
+    plain, vectorised = cluster_both(monkeypatch, list(range(n)), x0, y0, y1, hs)
+    assert vectorised == plain
+    assert sorted(i for row in plain for i in row) == list(range(n))
+
+
+def test_cluster_rows_branches_match_on_subset(monkeypatch):
+    pytest.importorskip("numpy")
+    x0, y0, _, y1, hs, _ = make_columns(300, seed=7)
+    idx = list(range(0, 300, 3))
+    plain, vectorised = cluster_both(monkeypatch, idx, x0, y0, y1, hs)
+    assert vectorised == plain
+
+
+def test_cluster_rows_inverted_boxes_use_plain_rows(monkeypatch):
+    pytest.importorskip("numpy")
+    x0, y0, _, y1, hs, _ = make_columns(50, seed=3)
+    y1 = list(y1)
+    y1[10] = y0[10] - 5.0
+    plain, vectorised = cluster_both(monkeypatch, list(range(50)), x0, y0, y1, hs)
+    assert vectorised == plain
+
+
+def test_cluster_rows_empty():
+    assert pdf_text_cli.cluster_rows([], [], [], [], []) == []
+
+
+def test_build_zoned_text_branches_match(monkeypatch):
+    pytest.importorskip("numpy")
+    fitz = pytest.importorskip("pymupdf")
+
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)
+    rng = random.Random(5)
+    for i in range(600):
+        page.insert_text((rng.uniform(20, 540), rng.uniform(20, 820)), f"v{i}", fontsize=rng.choice([6, 8, 10]))
+    page_dict = page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)
+
+    monkeypatch.setattr(pdf_text_cli, "VECTORIZE_MIN_ITEMS", 10**9)
+    plain = pdf_text_cli.build_zoned_text(page, page_dict, 1, True)
+    monkeypatch.setattr(pdf_text_cli, "VECTORIZE_MIN_ITEMS", 1)
+    vectorised = pdf_text_cli.build_zoned_text(page, page_dict, 1, True)
+    assert vectorised == plain
+    assert plain[1]["rows"]
+
+
+def reference_zoned_text(page_dict, w, h, page_no, include_zones):
+    """Zoning of the original pdf_text_cli (one dict per span), kept as the expected output."""
+    spans = []
+    for b in page_dict.get("blocks", []) or []:
+        for ln in b.get("lines", []) or []:
+            if not ln.get("bbox") or len(ln["bbox"]) < 4:
+                continue
+            for s in ln.get("spans", []) or []:
+                sb = s.get("bbox")
+                txt = str(s.get("text", "") or "").replace("\r", "\n").strip()
+                if not sb or len(sb) < 4 or not txt:
+                    continue
+                x0, y0, x1, y1 = (float(v) for v in sb[:4])
+                spans.append({"x0": x0, "y0": y0, "x1": x1, "y1": y1, "h": max(y1 - y0, 1.0), "t": txt})
+    if not spans:
+        return "", None
+
+    def cluster_rows(items):
+        if not items:
+            return []
+        items.sort(key=lambda it: (it["y0"], it["x0"]))
+        hs = sorted(it["h"] for it in items)
+        mid = len(hs) // 2
+        median_h = hs[mid] if len(hs) % 2 else (hs[mid - 1] + hs[mid]) / 2.0
+        row_tol = max(6.0, median_h * 0.7)
+        rows, current, current_max_y = [], [], None
+        for it in items:
+            if current and current_max_y is not None and it["y0"] > current_max_y + row_tol:
+                rows.append(current)
+                current, current_max_y = [it], it["y1"]
+            else:
+                current.append(it)
+                current_max_y = it["y1"] if current_max_y is None else max(current_max_y, it["y1"])
+        if current:
+            rows.append(current)
+        for row in rows:
+            row.sort(key=lambda it: it["x0"])
+        return rows
+
+    names = ("header_left", "header_right", "buyer", "password", "items", "seller", "remarks", "footer")
+    buckets = {name: [] for name in names}
+    for it in spans:
+        cx = ((it["x0"] + it["x1"]) / 2.0) / w
+        cy = ((it["y0"] + it["y1"]) / 2.0) / h
+        buckets[pdf_text_cli.region_for(cx, cy)].append(it)
+
+    def rows_to_lines(region):
+        out = []
+        for row in cluster_rows(list(buckets[region])):
+            parts = [t for it in row if (t := it["t"].replace("\n", " ").strip())]
+            if parts:
+                out.append(" ".join(parts))
+        return out
+
+    sections = [
+        ("发票信息", rows_to_lines("header_right") + rows_to_lines("header_left")),
+        ("购买方", rows_to_lines("buyer")),
+        ("密码区", rows_to_lines("password")),
+        ("明细", rows_to_lines("items")),
+        ("销售方", rows_to_lines("seller")),
+        ("备注/其他", rows_to_lines("remarks") + rows_to_lines("footer")),
+    ]
+    out = [f"【第{page_no}页-分区】"]
+    for title, lines in sections:
+        if lines:
+            out += [f"【{title}】", *lines, ""]
+
+    zone_payload = None
+    if include_zones:
+        rows = []
+        for region in names:
+            for row in cluster_rows(list(buckets[region])):
+                row = [(it, t) for it in row if (t := it["t"].replace("\n", " ").strip())]
+                if not row:
+                    continue
+                rows.append(
+                    {
+                        "region": region,
+                        "y0": min(it["y0"] for it, _ in row),
+                        "y1": max(it["y1"] for it, _ in row),
+                        "text": " ".join(t for _, t in row),
+                        "spans": [{"x0": it["x0"], "y0": it["y0"], "x1": it["x1"], "y1": it["y1"], "t": t} for it, t in row],
+                    }
+                )
+        zone_payload = {"page": page_no, "width": w, "height": h, "rows": rows}
+    return "\n".join(out).rstrip(), zone_payload
+
+
+@pytest.mark.parametrize("n_spans", [0, 30, 600])
+@pytest.mark.parametrize("min_items", [1, 10**9])
+def test_build_zoned_text_matches_reference(monkeypatch, n_spans, min_items):
+    if min_items == 1:
+        pytest.importorskip("numpy")
+    fitz = pytest.importorskip("pymupdf")
+    monkeypatch.setattr(pdf_text_cli, "VECTORIZE_MIN_ITEMS", min_items)
+
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)
+    rng = random.Random(n_spans)
+    for i in range(n_spans):
+        page.insert_text((rng.uniform(20, 540), rng.uniform(20, 820)), f"字段{i} 12.{i}", fontsize=rng.choice([6, 9]))
+    page_dict = page.get_text("dict", flags=fitz.TEXTFLAGS_TEXT)
+
+    for include_zones in (False, True):
+        got = pdf_text_cli.build_zoned_text(page, page_dict, 2, include_zones)
+        assert got == reference_zoned_text(page_dict, 595.0, 842.0, 2, include_zones)